@@ -0,0 +1,45 @@
+import numpy as np
+from settings import *
+
+ACTIVE, NEAR, FAR, DORMANT, FROZEN = range(5)
+
+
+class AIScheduler:
+    # picks the npcs that run their logic on a tick, by distance, visibility and state,
+    # npcs in chunks that are not loaded are frozen
+    levels = ('active', 'near', 'far', 'dormant', 'frozen')
+
+    def __init__(self, game):
+        self.game = game
+        self.tick = 0
+        self.stats = dict.fromkeys(self.levels, 0)  # npcs updated at each level on the last tick
+
+    def get_levels(self, store):
+        alive, pain, search, dist, screen_x, norm_dist, half_width, frame_counter, death_frames = store.get(
+            'alive', 'pain', 'player_search_trigger', 'dist', 'screen_x', 'norm_dist', 'IMAGE_HALF_WIDTH',
+            'frame_counter', 'death_frames')
+        on_screen = (-half_width < screen_x) & (screen_x < WIDTH + half_width) & (norm_dist > 0.5)
+        levels = np.where((dist < AI_LOD_NEAR_DIST) | on_screen, NEAR, FAR)
+        levels[alive & (pain | search)] = ACTIVE
+        levels[~alive] = np.where(frame_counter < death_frames, ACTIVE, DORMANT)[~alive]
+        return levels
+
+    def get_active(self):
+        store = self.game.object_handler.npc_store
+        self.tick += 1
+        loaded = self.game.object_handler.chunks.get_loaded(*store.get('x', 'y'))
+        if not AI_LOD:
+            self.stats = dict.fromkeys(self.levels, 0)
+            self.stats['active'] = int(loaded.sum())
+            self.stats['frozen'] = store.count - self.stats['active']
+            return loaded
+
+        # round-robin, npc i runs on the ticks where (tick + i) is a multiple of its interval
+        levels = self.get_levels(store)
+        levels[~loaded] = FROZEN
+        intervals = np.array(AI_LOD_INTERVALS + (0,))[levels]
+        active = (intervals > 0) & ((self.tick + np.arange(store.count)) % np.maximum(intervals, 1) == 0)
+
+        self.stats = dict(zip(self.levels, np.bincount(levels[active], minlength=len(self.levels)).tolist()))
+        self.stats['frozen'] = store.count - int(loaded.sum())
+        return active
@@ -0,0 +1,39 @@
+import os
+import pygame as pg
+
+# every asset is loaded once per process and then shared by all games, nothing may draw on or change one
+assets = {}
+
+
+def load_cached(key, load):
+    if key not in assets:
+        assets[key] = load()
+    return assets[key]
+
+
+def load_image(path, size=None):
+    def load():
+        image = pg.image.load(path).convert_alpha()
+        return pg.transform.scale(image, size) if size else image
+    return load_cached(('image', path, size and tuple(size)), load)
+
+
+def load_frames(path, size=None):
+    # the images of a frame directory, weapon frames are smooth scaled to `size`
+    def load():
+        frames = []
+        for file_name in os.listdir(path):
+            if os.path.isfile(os.path.join(path, file_name)):
+                image = load_image(path + '/' + file_name)
+                frames.append(pg.transform.smoothscale(image, size) if size else image)
+        return tuple(frames)
+    return load_cached(('frames', path, size and tuple(size)), load)
+
+
+def load_sound(path):
+    return load_cached(('sound', path), lambda: pg.mixer.Sound(path))
+
+
+def clear_assets():
+    # surfaces are converted for the display, they go when pygame quits
+    assets.clear()
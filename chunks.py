@@ -0,0 +1,77 @@
+import numpy as np
+from settings import *
+
+
+class ChunkManager:
+    # the map split in CHUNK_SIZE tile squares, entities are only created and simulated near the player
+    def __init__(self, game):
+        self.game = game
+        self.cols = -(-game.map.cols // CHUNK_SIZE)
+        self.rows = -(-game.map.rows // CHUNK_SIZE)
+        self.radius = CHUNK_RADIUS if game.streaming else max(self.cols, self.rows)
+        self.loaded = np.zeros((self.cols, self.rows), dtype=bool)
+        self.center = None
+        self.version = 0  # bumped when chunks load or unload
+        self.tiles = None  # loaded flag of every map tile, built on demand
+        self.count = 0  # entries queued so far, keeps the creation order across chunks
+        self.entries = {}  # chunk -> (order, build) of entities created each time the chunk loads
+        self.pending = {}  # chunk -> (order, build) of entities created once, on the first load
+        self.objects = {}  # chunk -> objects created by the entries of a loaded chunk
+
+    def get_chunk(self, x, y):
+        return min(int(x) // CHUNK_SIZE, self.cols - 1), min(int(y) // CHUNK_SIZE, self.rows - 1)
+
+    def add(self, pos, build, keep=False):
+        # build(game) is called once the chunk holding pos loads; kept entities are never unloaded
+        entries = self.pending if keep else self.entries
+        entries.setdefault(self.get_chunk(*pos), []).append((self.count, build))
+        self.count += 1
+
+    def get_loaded(self, x, y):
+        # loaded flags of many positions at once
+        cx = np.minimum(x.astype(int) // CHUNK_SIZE, self.cols - 1)
+        cy = np.minimum(y.astype(int) // CHUNK_SIZE, self.rows - 1)
+        return self.loaded[cx, cy]
+
+    def get_tiles(self):
+        if self.tiles is None:
+            tiles = np.repeat(np.repeat(self.loaded, CHUNK_SIZE, 0), CHUNK_SIZE, 1)
+            self.tiles = tiles[:self.game.map.cols, :self.game.map.rows].ravel()
+        return self.tiles
+
+    def update(self):
+        center = self.get_chunk(*self.game.player.map_pos)
+        if center == self.center:
+            return
+        self.center = center
+        cx, cy = center
+        # chunks load within radius and unload one chunk further out, so walking a border doesn't thrash
+        xs, ys = np.arange(self.cols)[:, None], np.arange(self.rows)[None, :]
+        dist = np.maximum(abs(xs - cx), abs(ys - cy))
+        load = (dist <= self.radius) & ~self.loaded
+        unload = (dist > self.radius + 1) & self.loaded
+        if not (load.any() or unload.any()):
+            return
+        for chunk in map(tuple, np.argwhere(unload).tolist()):
+            self.unload(chunk)
+        self.load(list(map(tuple, np.argwhere(load).tolist())))
+        self.loaded |= load
+        self.loaded &= ~unload
+        self.tiles = None
+        self.version += 1
+
+    def load(self, chunks):
+        entries = []
+        for chunk in chunks:
+            entries += [(order, build, chunk) for order, build in self.entries.get(chunk, ())]
+            entries += [(order, build, None) for order, build in self.pending.pop(chunk, ())]
+        for order, build, chunk in sorted(entries, key=lambda entry: entry[0]):
+            obj = build(self.game)
+            if chunk is not None:
+                self.objects.setdefault(chunk, []).append(obj)
+
+    def unload(self, chunk):
+        objects = set(map(id, self.objects.pop(chunk, ())))
+        if objects:
+            handler = self.game.object_handler
+            handler.sprite_list = [sprite for sprite in handler.sprite_list if id(sprite) not in objects]
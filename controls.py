@@ -0,0 +1,73 @@
+import pygame as pg
+from settings import *
+
+
+class LiveInput:
+    # keyboard and mouse, read once per tick. clicks come in as events and fire on the next tick
+    def __init__(self, game):
+        self.game = game
+        self.keys, self.mouse_rel, self.fire = None, (0, 0), False
+        self.clicked = False
+
+    def handle_event(self, event):
+        if event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+            self.clicked = True
+
+    def update(self):
+        self.keys = pg.key.get_pressed()
+        mx, my = pg.mouse.get_pos()
+        if mx < MOUSE_BORDER_LEFT or mx > MOUSE_BORDER_RIGHT:
+            pg.mouse.set_pos([HALF_WIDTH, HALF_HEIGHT])
+        self.mouse_rel = pg.mouse.get_rel()
+        self.fire, self.clicked = self.clicked, False
+
+    def get_keys(self):
+        return self.keys
+
+    def get_mouse_rel(self):
+        return self.mouse_rel
+
+    def get_fire(self):
+        return self.fire
+
+
+class ScriptedKeys:
+    # the pressed keys of a tick, indexed like pg.key.get_pressed()
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+class ScriptedInput:
+    # input from a script, a list of per tick commands or a function(game, tick) returning one.
+    # a command is (keys, mouse_rel, fire), e.g. ({pg.K_w}, (4, 0), False), None is no input
+    def __init__(self, game, script=None):
+        self.game = game
+        self.script = script
+        self.tick = 0
+        self.keys, self.mouse_rel, self.fire = ScriptedKeys(), (0, 0), False
+
+    def handle_event(self, event):
+        pass
+
+    def update(self):
+        if callable(self.script):
+            command = self.script(self.game, self.tick)
+        elif self.script is not None and self.tick < len(self.script):
+            command = self.script[self.tick]
+        else:
+            command = None
+        keys, self.mouse_rel, self.fire = command or ((), (0, 0), False)
+        self.keys = ScriptedKeys(keys)
+        self.tick += 1
+
+    def get_keys(self):
+        return self.keys
+
+    def get_mouse_rel(self):
+        return self.mouse_rel
+
+    def get_fire(self):
+        return self.fire
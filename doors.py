@@ -0,0 +1,158 @@
+import math
+from settings import *
+
+CLOSED, OPENING, OPEN, CLOSING = range(4)
+
+
+class Door:
+    # a wall tile that opens when used and closes again after open_time, unless something stands in it
+    def __init__(self, game, pos, texture=None, open_time=DOOR_OPEN_TIME):
+        self.game = game
+        self.x, self.y = pos
+        self.texture = texture or game.map.get_tile(*pos) or 1
+        self.open_time = open_time  # 0 stays open
+        self.state = CLOSED if game.map.is_wall(*pos) else OPEN
+        self.time_prev = game.sim_time
+
+    @property
+    def pos(self):
+        return self.x, self.y
+
+    def check_time(self, time):
+        if self.game.sim_time - self.time_prev >= time:
+            self.time_prev = self.game.sim_time
+            return True
+
+    def use(self):
+        if self.state == CLOSED:
+            self.state = OPENING
+            self.time_prev = self.game.sim_time
+
+    def update(self):
+        # False once the door has nothing left to do until it is used again
+        doors = self.game.doors
+        if self.state == OPENING and self.check_time(DOOR_MOVE_TIME):
+            self.game.map.set_tile(self.x, self.y, 0)
+            self.state = OPEN
+        elif self.state == OPEN and self.open_time and self.check_time(self.open_time):
+            self.state = OPEN if doors.is_occupied(self.pos) else CLOSING
+        elif self.state == CLOSING and self.check_time(DOOR_MOVE_TIME):
+            if doors.is_occupied(self.pos):
+                self.state = OPEN
+            else:
+                self.game.map.set_tile(self.x, self.y, self.texture)
+                self.state = CLOSED
+        return self.state != CLOSED and (self.state != OPEN or bool(self.open_time))
+
+
+class PushWall(Door):
+    # a wall that slides away from the player when used, a tile at a time until it is stopped
+    def __init__(self, game, pos, texture=None, dist=PUSH_WALL_DIST, direction=None):
+        super().__init__(game, pos, texture, open_time=0)
+        self.dist = dist
+        self.direction = tuple(direction) if direction else None
+        self.steps = 0
+        self.used = False
+
+    def use(self):
+        if self.used:
+            return
+        if self.direction is None:
+            dx, dy = self.x + 0.5 - self.game.player.x, self.y + 0.5 - self.game.player.y
+            self.direction = (int(math.copysign(1, dx)), 0) if abs(dx) > abs(dy) else (0, int(math.copysign(1, dy)))
+        self.used = True
+        self.steps = self.dist
+        self.time_prev = self.game.sim_time
+
+    def update(self):
+        if not self.steps or not self.check_time(PUSH_WALL_STEP_TIME):
+            return bool(self.steps)
+        x, y = self.x + self.direction[0], self.y + self.direction[1]
+        game_map = self.game.map
+        if not (0 <= x < game_map.cols and 0 <= y < game_map.rows) or game_map.is_wall(x, y) or \
+                self.game.doors.is_occupied((x, y)):
+            self.steps = 0
+            return False
+        game_map.set_tile(x, y, self.texture)
+        game_map.set_tile(self.x, self.y, 0)
+        self.game.doors.move(self, (x, y))
+        self.steps -= 1
+        return bool(self.steps)
+
+
+class BreakableWall(Door):
+    # a wall tile worn down by shots, gone once its health runs out
+    def __init__(self, game, pos, texture=None, health=BREAKABLE_WALL_HEALTH):
+        super().__init__(game, pos, texture, open_time=0)
+        self.health = health
+
+    def use(self):
+        pass
+
+    def update(self):
+        return False
+
+    def get_hit(self, damage):
+        self.health -= damage
+        if self.health <= 0 and self.state == CLOSED:
+            self.game.map.set_tile(self.x, self.y, 0)
+            self.state = OPEN
+            self.game.doors.remove(self)
+
+
+class DoorHandler:
+    # the doors, push walls and breakable walls of a level by tile.
+    # they only change map tiles, Map.set_tile tells the nav graph, path caches and visibility table
+    def __init__(self, game):
+        self.game = game
+        self.doors = {}
+        self.active = []  # doors with a timer running, in the order they were used
+        self.door_types = [Door, PushWall, BreakableWall]
+        door_types = {door.__name__: door for door in self.door_types}
+        for entry in game.level.doors:
+            args = {name: value for name, value in entry.items() if name != 'type'}
+            args['pos'] = tuple(args['pos'])
+            self.add(door_types[entry['type']](game, **args))
+
+    def add(self, door):
+        self.doors[door.pos] = door
+
+    def remove(self, door):
+        self.doors.pop(door.pos, None)
+        if door in self.active:
+            self.active.remove(door)
+
+    def move(self, door, pos):
+        del self.doors[door.pos]
+        door.x, door.y = pos
+        self.doors[pos] = door
+
+    def is_occupied(self, pos):
+        return pos == self.game.player.map_pos or pos in self.game.object_handler.npc_positions
+
+    def get_wall(self, ox, oy, angle, max_dist=math.inf):
+        # the door of the first wall along a ray, if the wall is one and close enough
+        if not self.doors:
+            return None
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        dist, tiles = self.game.hitscan.get_wall_hit(ox, oy, cos_a, sin_a)
+        if dist is None or dist > max_dist:
+            return None
+        # a hair past the impact point is inside the wall tile
+        return self.doors.get((int(ox + (dist + 1e-6) * cos_a), int(oy + (dist + 1e-6) * sin_a)))
+
+    def use(self, ox, oy, angle):
+        door = self.get_wall(ox, oy, angle, PLAYER_USE_DIST)
+        if door is not None:
+            door.use()
+            if door not in self.active:
+                self.active.append(door)
+
+    def get_hit(self, ox, oy, angle, damage):
+        door = self.get_wall(ox, oy, angle)
+        if isinstance(door, BreakableWall):
+            door.get_hit(damage)
+
+    def update(self):
+        if self.active:
+            self.active = [door for door in self.active if door.update()]
@@ -0,0 +1,102 @@
+import argparse
+import csv
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from headless import *
+
+fields = ('episode', 'seed', 'result', 'ticks', 'survival_time', 'kills', 'npcs', 'damage_taken', 'health')
+
+
+def aim_bot(game, tick):
+    # turns to the nearest npc in sight and fires once on target, wanders otherwise
+    player = game.player
+    target, target_dist = None, math.inf
+    for npc in game.object_handler.npc_list:
+        if npc.alive and npc.ray_cast_value and npc.dist < target_dist:
+            target, target_dist = npc, npc.dist
+    if target is None:
+        return ({pg.K_w} if tick % 240 < 180 else {pg.K_d}), (4, 0), False
+    turn = (math.atan2(target.y - player.y, target.x - player.x) - player.angle + math.pi) % math.tau - math.pi
+    rel = max(-MOUSE_MAX_REL, min(MOUSE_MAX_REL, turn / (MOUSE_SENSITIVITY * SIM_TICK)))
+    return (), (rel, 0), abs(turn) < 0.05
+
+
+bots = {'aim': aim_bot, 'idle': None}
+
+
+def set_npc_stats(game, npc_stats):
+    # npc_stats maps 'name' or 'NPCType.name' to a value, e.g. {'accuracy': 0.2, 'SoldierNPC.speed': 0.04}
+    game.object_handler.set_npc_stats(npc_stats)
+
+
+def run_episode(episode, seed, ticks, bot='aim', weapon='shotgun', npc_stats=None):
+    game = HeadlessGame(script=bots[bot], weapon=weapon, seed=seed)
+    set_npc_stats(game, npc_stats or {})
+    result = game.run(ticks) or 'timeout'
+    npc_list = game.object_handler.npc_list
+    game.path_service.close()
+    return {'episode': episode, 'seed': seed, 'result': result, 'ticks': game.ticks,
+            'survival_time': round(game.sim_time / 1000, 3), 'kills': sum(not npc.alive for npc in npc_list),
+            'npcs': len(npc_list), 'damage_taken': game.player.damage_taken, 'health': game.player.health}
+
+
+def run_episodes(episodes, path, workers=None, seed=0, **kwargs):
+    # runs episodes on a process pool, each row is written to the csv file as soon as it is done
+    workers = workers or os.cpu_count()
+    results = []
+    with open(path, 'w', newline='') as file, \
+            ProcessPoolExecutor(workers, multiprocessing.get_context('spawn')) as executor:
+        writer = csv.DictWriter(file, fields)
+        writer.writeheader()
+        futures = [executor.submit(run_episode, i, seed + i, **kwargs) for i in range(episodes)]
+        for future in as_completed(futures):
+            try:
+                row = future.result()
+            except Exception as e:
+                print(f"Error: episode failed: {e}")
+                continue
+            writer.writerow(row)
+            file.flush()
+            results.append(row)
+    return results
+
+
+def get_summary(results):
+    count = len(results) or 1
+    return {
+        'episodes': len(results),
+        'win_rate': sum(row['result'] == 'win' for row in results) / count,
+        'loss_rate': sum(row['result'] == 'lose' for row in results) / count,
+        'survival_time': sum(row['survival_time'] for row in results) / count,
+        'kills': sum(row['kills'] for row in results) / count,
+        'damage_taken': sum(row['damage_taken'] for row in results) / count,
+    }
+
+
+def parse_npc_stat(text):
+    key, _, value = text.partition('=')
+    return key, float(value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run headless episodes in parallel.')
+    parser.add_argument('--episodes', type=int, default=100)
+    parser.add_argument('--ticks', type=int, default=3600, help='episode length in ticks')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first episode, the others count up')
+    parser.add_argument('--bot', choices=bots, default='aim')
+    parser.add_argument('--weapon', default='shotgun')
+    parser.add_argument('--npc', type=parse_npc_stat, action='append', default=[],
+                        help="npc stat override, e.g. accuracy=0.2 or SoldierNPC.speed=0.04")
+    parser.add_argument('--out', default='episodes.csv')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_episodes(args.episodes, args.out, args.workers, args.seed, ticks=args.ticks, bot=args.bot,
+                           weapon=args.weapon, npc_stats=dict(args.npc))
+    elapsed = time.perf_counter() - start
+    summary = ' '.join(f'{name} {value:.3g}' for name, value in get_summary(results).items())
+    print(f'{summary} ({len(results) / elapsed * 60:.0f} episodes/min)')
@@ -0,0 +1,150 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import argparse
+import time
+import pygame as pg
+from settings import *
+from map import *
+from player import *
+from raycasting import *
+from object_handler import *
+from weapon import *
+from hitscan import *
+from controls import *
+from pathfinding import *
+from path_service import *
+from visibility import *
+from level import *
+from doors import *
+from recording import *
+from random import seed as random_seed
+
+
+class NullSound:
+    # stands in for Sound and for each of its sounds, nothing is played
+    def __getattr__(self, name):
+        return self
+
+    def play(self, *args):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+
+class NullRenderer:
+    # stands in for ObjectRenderer, no textures are loaded and nothing is drawn
+    wall_textures = {}
+
+    def __init__(self, game):
+        self.game = game
+
+    def update(self):
+        pass
+
+    def win(self):
+        pass
+
+    def game_over(self):
+        pass
+
+    def player_damage(self):
+        pass
+
+
+class HeadlessGame:
+    # the simulation of Game without a window, audio or rendering, driven by a ScriptedInput
+    def __init__(self, script=None, weapon='shotgun', seed=None, record=None, replay=None, level=LEVEL,
+                 streaming=CHUNK_STREAMING, path_async=False):
+        pg.init()
+        self.screen = pg.display.set_mode((1, 1))  # sprite images still need a display to convert
+        random_seed(seed)
+        self.seed = seed
+        self.delta_time = SIM_TICK
+        self.ticks = 0
+        self.global_trigger = False
+        self.script = script
+        self.record, self.replay = record, replay  # input recording paths, see recording.py
+        self.level_path = level
+        self.streaming = streaming  # chunk streaming, see chunks.py
+        self.path_async = path_async  # background path searches, off so that seeded runs repeat
+        self.selected_weapon = weapon
+        self.sound = NullSound()
+        self.result = None  # 'win' or 'lose' once the game is over
+        self.new_game()
+
+    def get_input(self):
+        if self.replay:
+            return InputReplay(self, self.replay)
+        if self.record:
+            return InputRecorder(self, ScriptedInput(self, self.script), self.record, self.seed)
+        return ScriptedInput(self, self.script)
+
+    def new_game(self):
+        self.sim_time = 0
+        self.input = self.get_input()
+        self.level = Level(self.level_path)
+        self.map = Map(self)
+        self.visibility = VisibilityTable(self) if VISIBILITY_TABLE else None
+        self.player = Player(self)
+        self.object_renderer = NullRenderer(self)
+        self.raycasting = RayCasting(self)
+        self.object_handler = ObjectHandler(self)
+        self.weapon = Weapon(self, self.selected_weapon)
+        self.pathfinding = PathFinding(self)
+        if hasattr(self, 'path_service'):
+            self.path_service.close()
+        self.path_service = PathService(self)
+        self.hitscan = Hitscan(self)
+        self.doors = DoorHandler(self)
+
+    def win(self):
+        self.result = 'win'
+
+    def game_over(self):
+        self.result = 'lose'
+
+    def tick(self):
+        self.input.update()
+        self.global_trigger = (self.sim_time + SIM_TICK) // SIM_TRIGGER_TIME > self.sim_time // SIM_TRIGGER_TIME
+        self.sim_time += SIM_TICK
+        self.ticks += 1
+        self.player.update()
+        self.doors.update()
+        self.object_handler.update()
+        self.weapon.update()
+
+    def run(self, ticks):
+        # runs until the game is won or lost or `ticks` ticks have passed, returns the result
+        while self.result is None and self.ticks < ticks:
+            self.tick()
+        return self.result
+
+    def close(self):
+        if isinstance(self.input, InputRecorder):
+            self.input.close()
+        self.path_service.close()
+        clear_assets()
+        pg.quit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the game simulation without a window.')
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--weapon', default='shotgun')
+    parser.add_argument('--level', default=LEVEL)
+    parser.add_argument('--record', default=None, help='file to record the seed and input to')
+    parser.add_argument('--replay', default=None, help='recording to play back')
+    args = parser.parse_args()
+
+    game = HeadlessGame(weapon=args.weapon, seed=args.seed, record=args.record, replay=args.replay,
+                        level=args.level)
+    start = time.perf_counter()
+    result = game.run(args.ticks)
+    elapsed = time.perf_counter() - start
+    alive = sum(npc.alive for npc in game.object_handler.npc_list)
+    print(f'{result or "running"} after {game.ticks} ticks ({game.sim_time / 1000:.1f}s simulated), '
+          f'player health {game.player.health}, {alive} npcs alive, {game.ticks / elapsed:.0f} ticks/s')
+    game.close()
@@ -0,0 +1,207 @@
+import math
+from heapq import heappush, heappop
+from settings import *
+
+
+class HierarchicalPathFinding:
+    def __init__(self, pathfinding, cluster_size=PATH_CLUSTER_SIZE):
+        self.pathfinding = pathfinding
+        self.nav = pathfinding.nav
+        self.octile = pathfinding.octile
+        self.size = cluster_size
+        self.cols = pathfinding.game.map.cols
+        self.rows = pathfinding.game.map.rows
+        self.cluster_cols = math.ceil(self.cols / self.size)
+        self.cluster_rows = math.ceil(self.rows / self.size)
+        self.links = {}  # border -> [(node, node)] entrances between two clusters
+        self.partners = {}  # node -> nodes across a cluster border
+        self.cluster_nodes = {}  # cluster -> entrance nodes inside it
+        self.edges = {}  # node -> {node: cost} inside the same cluster
+        self.get_abstract_graph()
+
+    def get_cluster(self, node):
+        return node[0] // self.size, node[1] // self.size
+
+    def get_bounds(self, cluster):
+        cx, cy = cluster
+        return (cx * self.size, cy * self.size,
+                min((cx + 1) * self.size, self.cols), min((cy + 1) * self.size, self.rows))
+
+    def get_borders(self, cluster):
+        cx, cy = cluster
+        borders = []
+        if cx > 0:
+            borders.append(((cx - 1, cy), cluster))
+        if cx < self.cluster_cols - 1:
+            borders.append((cluster, (cx + 1, cy)))
+        if cy > 0:
+            borders.append(((cx, cy - 1), cluster))
+        if cy < self.cluster_rows - 1:
+            borders.append((cluster, (cx, cy + 1)))
+        return borders
+
+    def get_abstract_graph(self):
+        clusters = [(cx, cy) for cx in range(self.cluster_cols) for cy in range(self.cluster_rows)]
+        for cluster in clusters:
+            for border in self.get_borders(cluster):
+                if border[0] == cluster:
+                    self.update_border(border)
+        for cluster in clusters:
+            self.update_cluster(cluster)
+
+    def update_border(self, border):
+        for a, b in self.links.get(border, []):
+            self.remove_partner(a, b)
+            self.remove_partner(b, a)
+
+        (cx, cy), (nx, ny) = border
+        if nx > cx:
+            x0, y0, x1, y1 = self.get_bounds(border[0])
+            pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            x0, y0, x1, y1 = self.get_bounds(border[0])
+            pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+
+        # one entrance in the middle of a short opening, one at each end of a long one
+        links, run = [], []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and self.nav.is_free(*a) and self.nav.is_free(*b):
+                run.append((a, b))
+                continue
+            if run:
+                links += [run[len(run) // 2]] if len(run) < 6 else [run[0], run[-1]]
+                run = []
+
+        self.links[border] = links
+        for a, b in links:
+            self.partners.setdefault(a, set()).add(b)
+            self.partners.setdefault(b, set()).add(a)
+
+    def remove_partner(self, node, partner):
+        partners = self.partners.get(node)
+        if partners is not None:
+            partners.discard(partner)
+            if not partners:
+                del self.partners[node]
+
+    def update_cluster(self, cluster):
+        for node in self.cluster_nodes.get(cluster, []):
+            self.edges.pop(node, None)
+
+        nodes = {node for border in self.get_borders(cluster) for link in self.links[border]
+                 for node in link if self.get_cluster(node) == cluster}
+        self.cluster_nodes[cluster] = nodes
+        for node in nodes:
+            costs, _ = self.search_cluster(node, cluster)
+            self.edges[node] = {other: costs[self.nav.get_id(*other)] for other in nodes
+                                if other != node and self.nav.get_id(*other) in costs}
+
+    def update_tile(self, x, y):
+        cluster = self.get_cluster((x, y))
+        x0, y0, x1, y1 = self.get_bounds(cluster)
+        clusters = {cluster}
+        for border in self.get_borders(cluster):
+            other = border[1] if border[0] == cluster else border[0]
+            if ((other[0] < cluster[0] and x == x0) or (other[0] > cluster[0] and x == x1 - 1) or
+                    (other[1] < cluster[1] and y == y0) or (other[1] > cluster[1] and y == y1 - 1)):
+                self.update_border(border)
+                clusters.add(other)
+        for cluster in clusters:
+            self.update_cluster(cluster)
+        if PATH_CHECK:
+            self.check_graph()
+
+    def check_graph(self):
+        # the graph patched by update_tile must equal one built from scratch
+        expanded_nodes = self.pathfinding.expanded_nodes
+        rebuilt = HierarchicalPathFinding(self.pathfinding, self.size)
+        self.pathfinding.expanded_nodes = expanded_nodes
+        for name in ('links', 'partners', 'cluster_nodes', 'edges'):
+            got, expected = getattr(self, name), getattr(rebuilt, name)
+            for key in set(got) | set(expected):
+                if got.get(key) != expected.get(key):
+                    print(f"Error: hpa {name} {key} mismatch, got {got.get(key)}, expected {expected.get(key)}")
+
+    def search_cluster(self, start, cluster, blocked=(), goal=None):
+        x0, y0, x1, y1 = self.get_bounds(cluster)
+        start = self.nav.get_id(*start)
+        goal = None if goal is None else self.nav.get_id(*goal)
+        heap = [(0, start)]
+        costs = {start: 0}
+        visited = {start: None}
+
+        while heap:
+            cost, cur_node = heappop(heap)
+            if cur_node == goal:
+                break
+            if cost > costs[cur_node]:
+                continue
+            self.pathfinding.expanded_nodes += 1
+
+            for next_node in self.nav.get_neighbour_ids(cur_node):
+                x, y = self.nav.get_pos(next_node)
+                if not (x0 <= x < x1 and y0 <= y < y1):
+                    continue
+                if self.pathfinding.is_blocked(cur_node, next_node, goal, blocked):
+                    continue
+                next_cost = cost + self.nav.get_cost(cur_node, next_node)
+                if next_cost < costs.get(next_node, math.inf):
+                    costs[next_node] = next_cost
+                    visited[next_node] = cur_node
+                    heappush(heap, (next_cost, next_node))
+        return costs, visited
+
+    def search_abstract(self, start, goal, start_edges, goal_edges):
+        heap = [(self.octile(start, goal), 0, start)]
+        costs = {start: 0}
+        visited = {start: None}
+
+        while heap:
+            _, cost, cur_node = heappop(heap)
+            if cur_node == goal:
+                break
+            if cost > costs[cur_node]:
+                continue
+            self.pathfinding.expanded_nodes += 1
+
+            edges = list(start_edges.items() if cur_node == start else self.edges.get(cur_node, {}).items())
+            edges += [(partner, 1) for partner in self.partners.get(cur_node, [])]
+            if cur_node in goal_edges:
+                edges.append((goal, goal_edges[cur_node]))
+
+            for next_node, edge_cost in edges:
+                next_cost = cost + edge_cost
+                if next_cost < costs.get(next_node, math.inf):
+                    costs[next_node] = next_cost
+                    visited[next_node] = cur_node
+                    heappush(heap, (next_cost + self.octile(next_node, goal), next_cost, next_node))
+        return visited
+
+    def get_next_step(self, start, goal, blocked):
+        start_cluster, goal_cluster = self.get_cluster(start), self.get_cluster(goal)
+        if start_cluster == goal_cluster:
+            _, visited = self.search_cluster(start, start_cluster, blocked, goal)
+            if self.nav.get_id(*goal) in visited:
+                return self.pathfinding.get_next_step(start, goal, visited)
+
+        start_costs, _ = self.search_cluster(start, start_cluster)
+        goal_costs, _ = self.search_cluster(goal, goal_cluster)
+        start_edges = {node: start_costs[self.nav.get_id(*node)] for node in self.cluster_nodes[start_cluster]
+                       if self.nav.get_id(*node) in start_costs}
+        goal_edges = {node: goal_costs[self.nav.get_id(*node)] for node in self.cluster_nodes[goal_cluster]
+                      if self.nav.get_id(*node) in goal_costs}
+
+        visited = self.search_abstract(start, goal, start_edges, goal_edges)
+        if goal not in visited:
+            return goal
+        waypoint = goal
+        while visited[waypoint] != start:
+            waypoint = visited[waypoint]
+
+        # refine only the first abstract edge, the rest is searched again next time
+        if waypoint in self.partners.get(start, ()):
+            return waypoint
+        _, visited = self.search_cluster(start, start_cluster, blocked, waypoint)
+        if self.nav.get_id(*waypoint) not in visited:
+            return goal
+        return self.pathfinding.get_next_step(start, waypoint, visited)
@@ -0,0 +1,68 @@
+import math
+import numpy as np
+from settings import *
+
+
+class Hitscan:
+    # single ray queries through the wall grid and the npc spatial hash, for shots
+    def __init__(self, game):
+        self.game = game
+
+    def get_wall_hit(self, ox, oy, cos_a, sin_a):
+        # walk the tiles along the ray, returns the wall distance (None if no wall) and the tiles passed
+        x, y = int(ox), int(oy)
+        step_x, step_y = (1 if cos_a > 0 else -1), (1 if sin_a > 0 else -1)
+        delta_x = abs(1 / cos_a) if cos_a else math.inf
+        delta_y = abs(1 / sin_a) if sin_a else math.inf
+        t_x = (x + (step_x > 0) - ox) / cos_a if cos_a else math.inf
+        t_y = (y + (step_y > 0) - oy) / sin_a if sin_a else math.inf
+
+        tiles = [(x, y)]
+        for i in range(2 * MAX_DEPTH):
+            if t_x < t_y:
+                x, dist, t_x = x + step_x, t_x, t_x + delta_x
+            else:
+                y, dist, t_y = y + step_y, t_y, t_y + delta_y
+            if self.game.map.is_wall(x, y):
+                return dist, tiles
+            if not (0 <= x < self.game.map.cols and 0 <= y < self.game.map.rows):
+                break
+            tiles.append((x, y))
+        return None, tiles
+
+    def cast(self, ox, oy, angle):
+        # nearest npc on the ray before the first wall: (npc or None, distance, wall impact point or None)
+        if HITSCAN_CHECK:
+            self.check_cast(ox, oy, angle)
+        return self.get_hit(ox, oy, angle)
+
+    def check_cast(self, ox, oy, angle, count=20, tolerance=1e-6):
+        # the shot and random rays from the same spot must hit what testing every live npc hits
+        for angle in [angle] + np.random.default_rng().uniform(0, math.tau, count).tolist():
+            npc, dist, _ = self.get_hit(ox, oy, angle)
+            expected, expected_dist, _ = self.get_hit(ox, oy, angle, brute_force=True)
+            if npc is not expected or abs(dist - expected_dist) > tolerance:
+                print(f"Error: shot at {angle:.4f} mismatch, got {npc} at {dist}, expected {expected} at {expected_dist}")
+
+    def get_hit(self, ox, oy, angle, brute_force=False):
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        wall_dist, tiles = self.get_wall_hit(ox, oy, cos_a, sin_a)
+        wall_pos = None if wall_dist is None else (ox + wall_dist * cos_a, oy + wall_dist * sin_a)
+        max_dist = math.inf if wall_dist is None else wall_dist
+
+        # npc sprites are up to a tile wide, so the tiles next to the ray are searched too
+        store = self.game.object_handler.npc_store
+        if brute_force:
+            ids = np.flatnonzero(store.get('alive')[0])
+        else:
+            ids = self.game.object_handler.npc_positions.get_items_around([x for x, y in tiles], [y for x, y in tiles])
+        if ids.size:
+            x, y, scale, ratio = store.get('x', 'y', 'SPRITE_SCALE', 'IMAGE_RATIO')
+            dx, dy = x[ids] - ox, y[ids] - oy
+            dist = dx * cos_a + dy * sin_a
+            # a hit is within half the sprite width of the npc, as seen on screen
+            hit = (dist > 0) & (dist < max_dist) & (np.abs(dy * cos_a - dx * sin_a) < scale[ids] * ratio[ids] / 2)
+            if hit.any():
+                i = np.flatnonzero(hit)[dist[hit].argmin()]
+                return store.npcs[ids[i]], float(dist[i]), wall_pos
+        return None, max_dist, wall_pos
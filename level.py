@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import numpy as np
+from settings import *
+
+CACHE_VERSION = 2  # bump when the compiled layout changes
+
+
+class Level:
+    # a level file (.json, or .txt holding only the map) and its compiled cache.
+    # the cache is keyed by a hash of the file, arrays in it are memory-mapped copy-on-write
+    def __init__(self, path, cache_dir=LEVEL_CACHE_DIR):
+        self.path = path
+        with open(path, 'rb') as file:
+            data = file.read()
+        key = hashlib.sha1(data + f'v{CACHE_VERSION}'.encode()).hexdigest()[:20]
+        self.cache_dir = os.path.join(cache_dir, key)
+        self.data = data
+        self.info = self.get_info()
+        self.name = self.info['name']
+        self.cols, self.rows = self.info['size']
+        self.player_pos = tuple(self.info['player'].get('pos', PLAYER_POS))
+        self.player_angle = self.info['player'].get('angle', PLAYER_ANGLE)
+        self.sprites, self.npcs, self.spawn = self.info['sprites'], self.info['npcs'], self.info['spawn']
+        self.doors = self.info['doors']
+
+    def parse(self):
+        if self.path.endswith('.json'):
+            level = json.loads(self.data)
+        else:
+            level = {'map': [row for row in self.data.decode().splitlines() if row.strip()]}
+        level.setdefault('name', os.path.splitext(os.path.basename(self.path))[0])
+        return level
+
+    def get_info(self):
+        # everything but the map, so a cached level is loaded without parsing the file
+        path = os.path.join(self.cache_dir, 'info.json')
+        if os.path.exists(path):
+            with open(path) as file:
+                return json.load(file)
+        level = self.parse()
+        rows = level.pop('map')
+        info = {'name': level['name'], 'size': [max(map(len, rows)), len(rows)],
+                'player': level.get('player', {}), 'sprites': level.get('sprites', []),
+                'npcs': level.get('npcs', []), 'spawn': level.get('spawn', {}), 'doors': level.get('doors', [])}
+        self.save(path, info)
+        return info
+
+    def get_grid(self):
+        # '.', '_' or ' ' is a free tile, a digit is a wall with that texture
+        rows = self.parse()['map']
+        grid = np.zeros((self.cols, self.rows), dtype=np.uint8)
+        for y, row in enumerate(rows):
+            line = np.frombuffer(row.encode(), dtype=np.uint8)
+            grid[:len(line), y] = np.where((line >= ord('1')) & (line <= ord('9')), line - ord('0'), 0)
+        return grid
+
+    def save(self, path, value):
+        # written under a temporary name first, other processes may be loading the same level
+        os.makedirs(self.cache_dir, exist_ok=True)
+        root, ext = os.path.splitext(path)
+        tmp = f'{root}.{os.getpid()}.tmp{ext}'
+        if isinstance(value, np.ndarray):
+            np.save(tmp, value)
+        else:
+            with open(tmp, 'w') as file:
+                json.dump(value, file)
+        os.replace(tmp, path)
+
+    def get_arrays(self, names, build):
+        # arrays from the cache, or from build() on the first load, saved for the next ones
+        paths = [os.path.join(self.cache_dir, f'{name}.npy') for name in names]
+        if all(os.path.exists(path) for path in paths):
+            try:
+                # plain views of the maps, memmap results are slow to wrap in hot paths
+                return [np.load(path, mmap_mode='c').view(np.ndarray) for path in paths]
+            except (OSError, ValueError) as e:
+                print(f"Error: broken level cache {self.cache_dir}: {e}")
+        arrays = build()
+        for path, array in zip(paths, arrays):
+            self.save(path, array)
+        return arrays
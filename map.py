@@ -1,57 +1,57 @@
-import pygame as pg
-
-_ = False
-mini_map = [
-    [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [1, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [1, _, _, 3, 3, 3, 3, _, _, _, 2, 2, 2, _, _, 1],
-    [1, _, _, _, _, _, 4, _, _, _, _, _, 2, _, _, 1],
-    [1, _, _, _, _, _, 4, _, _, _, _, _, 2, _, _, 1],
-    [1, _, _, 3, 3, 3, 3, _, _, _, _, _, _, _, _, 1],
-    [1, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [1, _, _, _, 4, _, _, _, 4, _, _, _, _, _, _, 1],
-    [1, 1, 1, 3, 1, 3, 1, 1, 1, 3, _, _, 3, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1, 3, _, _, 3, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1, 3, _, _, 3, 1, 1, 1],
-    [1, 1, 3, 1, 1, 1, 1, 1, 1, 3, _, _, 3, 1, 1, 1],
-    [1, 4, _, _, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [1, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [1, _, _, 2, _, _, _, _, _, 3, 4, _, 4, 3, _, 1],
-    [1, _, _, 5, _, _, _, _, _, _, 3, _, 3, _, _, 1],
-    [1, _, _, 2, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [1, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 1],
-    [1, 4, _, _, _, _, _, _, 4, _, _, 4, _, _, _, 1],
-    [1, 1, 3, 3, _, _, 3, 3, 1, 3, 3, 1, 3, 1, 1, 1],
-    [1, 1, 1, 3, _, _, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 3, 3, 4, _, _, 4, 3, 3, 3, 3, 3, 3, 3, 3, 1],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 3],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 3],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 3],
-    [3, _, _, 5, _, _, _, 5, _, _, _, 5, _, _, _, 3],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 3],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 3],
-    [3, _, _, _, _, _, _, _, _, _, _, _, _, _, _, 3],
-    [3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3],
-]
-
-
-class Map:
-    def __init__(self, game):
-        self.game = game
-        self.mini_map = mini_map
-        self.world_map = {}
-        self.rows = len(self.mini_map)
-        self.cols = len(self.mini_map[0])
-        self.get_map()
-
-    def get_map(self):
-        for j, row in enumerate(self.mini_map):
-            for i, value in enumerate(row):
-                if value:
-                    self.world_map[(i, j)] = value
-
-    def draw(self):
-        [pg.draw.rect(self.game.screen, 'darkgray', (pos[0] * 100, pos[1] * 100, 100, 100), 2)
+import pygame as pg
+import numpy as np
+from functools import cached_property
+
+
+class Map:
+    def __init__(self, game):
+        self.game = game
+        level = game.level
+        self.cols, self.rows = level.cols, level.rows
+        self.grid = level.get_arrays(('grid',), lambda: (level.get_grid(),))[0]
+        self.tiles = memoryview(self.grid)
+        self.listeners = []  # called with (x, y) after a tile changes
+
+    # the python views of the grid are only built when something asks for them
+    @cached_property
+    def mini_map(self):
+        return [[value or False for value in row] for row in self.grid.T.tolist()]
+
+    @cached_property
+    def world_map(self):
+        return {(x, y): self.tiles[x, y] for x, y in np.argwhere(self.grid).tolist()}
+
+    def get_tile(self, x, y):
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return self.tiles[x, y]
+        return 0
+
+    def is_wall(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.tiles[x, y] > 0
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def set_tile(self, x, y, value):
+        # the grid is a copy-on-write map of the level cache, changes never reach the file
+        self.grid[x, y] = value or 0
+        if 'mini_map' in self.__dict__:
+            self.mini_map[y][x] = value or False
+        if 'world_map' in self.__dict__:
+            if value:
+                self.world_map[(x, y)] = value
+            else:
+                self.world_map.pop((x, y), None)
+        for listener in self.listeners:
+            listener(x, y)
+
+    def get_tiles(self, xs, ys):
+        xs, ys = np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+        inside = (xs >= 0) & (xs < self.cols) & (ys >= 0) & (ys < self.rows)
+        tiles = np.zeros(xs.shape, dtype=self.grid.dtype)
+        tiles[inside] = self.grid[xs[inside], ys[inside]]
+        return tiles
+
+    def draw(self):
+        [pg.draw.rect(self.game.screen, 'darkgray', (pos[0] * 100, pos[1] * 100, 100, 100), 2)
          for pos in self.world_map]
\ No newline at end of file
@@ -0,0 +1,131 @@
+import argparse
+import json
+import random
+import numpy as np
+from settings import *
+
+
+def get_maze(cols, rows, rng, loops=0.05):
+    # depth-first carved maze, corridors run through the odd tiles
+    grid = np.ones((cols, rows), dtype=np.uint8)
+    cells_x, cells_y = (cols - 1) // 2, (rows - 1) // 2
+    visited = bytearray(cells_x * cells_y)
+    start = rng.randrange(cells_x * cells_y)
+    visited[start] = 1
+    stack = [start]
+    carved = [(start // cells_y, start % cells_y, 0, 0)]
+    while stack:
+        cell = stack[-1]
+        x, y = divmod(cell, cells_y)
+        options = [(dx, dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= x + dx < cells_x and 0 <= y + dy < cells_y and not visited[cell + dx * cells_y + dy]]
+        if not options:
+            stack.pop()
+            continue
+        dx, dy = rng.choice(options)
+        next_cell = cell + dx * cells_y + dy
+        visited[next_cell] = 1
+        stack.append(next_cell)
+        carved.append((x + dx, y + dy, dx, dy))
+    x, y, dx, dy = np.array(carved).T
+    grid[2 * x + 1, 2 * y + 1] = 0
+    grid[2 * x + 1 - dx, 2 * y + 1 - dy] = 0
+
+    # knock out some walls between corridors, so there is more than one way around
+    wall_x, wall_y = np.nonzero(grid[1:-1, 1:-1])
+    wall_x, wall_y = wall_x + 1, wall_y + 1
+    between = (((grid[wall_x - 1, wall_y] == 0) & (grid[wall_x + 1, wall_y] == 0)) |
+               ((grid[wall_x, wall_y - 1] == 0) & (grid[wall_x, wall_y + 1] == 0)))
+    wall_x, wall_y = wall_x[between], wall_y[between]
+    chosen = np.array(rng.sample(range(wall_x.size), int(wall_x.size * loops)), dtype=np.int64)
+    grid[wall_x[chosen], wall_y[chosen]] = 0
+    return grid
+
+
+def get_arena(cols, rows, rng, pillars=0.03):
+    # open floor with scattered single tile pillars, closed by a border wall
+    grid = np.zeros((cols, rows), dtype=np.uint8)
+    inner = (cols - 2) * (rows - 2)
+    chosen = np.array(rng.sample(range(inner), int(inner * pillars)), dtype=np.int64)
+    grid[1 + chosen // (rows - 2), 1 + chosen % (rows - 2)] = 1
+    grid[[0, -1], :] = grid[:, [0, -1]] = 1
+    return grid
+
+
+def get_rooms(cols, rows, rng, min_size=4, max_size=12):
+    # rectangular rooms joined in a chain by two tile wide corridors
+    grid = np.ones((cols, rows), dtype=np.uint8)
+    rooms = []
+    for i in range(cols * rows // (max_size * max_size)):
+        w, h = rng.randint(min_size, max_size), rng.randint(min_size, max_size)
+        x, y = rng.randint(1, cols - w - 1), rng.randint(1, rows - h - 1)
+        # rooms keep one tile of wall between them
+        if (grid[x - 1:x + w + 1, y - 1:y + h + 1] == 0).any():
+            continue
+        grid[x:x + w, y:y + h] = 0
+        rooms.append((x + w // 2, y + h // 2))
+    rooms.sort(key=lambda room: (room[0] // max_size, room[1] if room[0] // max_size % 2 else -room[1]))
+    for (x0, y0), (x1, y1) in zip(rooms, rooms[1:]):
+        grid[min(x0, x1):max(x0, x1) + 2, y0:y0 + 2] = 0
+        grid[x1:x1 + 2, min(y0, y1):max(y0, y1) + 2] = 0
+    grid[[0, -1], :] = grid[:, [0, -1]] = 1
+    return grid
+
+
+generators = {'maze': get_maze, 'arena': get_arena, 'rooms': get_rooms}
+
+
+def get_textures(grid, rng, block=8):
+    # walls take one texture per block of tiles
+    cols, rows = grid.shape
+    textures = np.array([[rng.randint(1, 5) for y in range(rows // block + 1)] for x in range(cols // block + 1)],
+                        dtype=np.uint8)
+    return np.where(grid > 0, textures.repeat(block, 0)[:cols].repeat(block, 1)[:, :rows], 0).astype(np.uint8)
+
+
+def generate_level(kind, cols, rows=None, seed=0, npcs=NPC_COUNT, sprites=None):
+    # a level dict in the format of level.py, the same seed gives the same level
+    rows = rows or cols
+    rng = random.Random(seed)
+    grid = get_textures(generators[kind](cols, rows, rng), rng)
+
+    free_x, free_y = np.nonzero(grid == 0)
+    start = np.argmin(free_x + free_y)
+    px, py = int(free_x[start]), int(free_y[start])
+    sprites = cols * rows // 200 if sprites is None else sprites
+    placed = rng.sample(range(free_x.size), min(sprites, free_x.size))
+    light = 'resources/sprites/animated_sprites/red_light/0.png'
+
+    chars = np.where(grid > 0, grid + ord('0'), ord('.')).astype(np.uint8)
+    return {
+        'name': f'{kind}_{cols}x{rows}_{seed}',
+        'map': [chars[:, y].tobytes().decode() for y in range(rows)],
+        'player': {'pos': [px + 0.5, py + 0.5], 'angle': 0},
+        'sprites': [{'type': 'AnimatedSprite', 'pos': [int(free_x[i]) + 0.5, int(free_y[i]) + 0.5]} if j % 2 else
+                    {'type': 'AnimatedSprite', 'path': light, 'pos': [int(free_x[i]) + 0.5, int(free_y[i]) + 0.5]}
+                    for j, i in enumerate(placed)],
+        'npcs': [],
+        'spawn': {'count': npcs, 'exclude': [[max(px - 5, 0), max(py - 5, 0), min(px + 5, cols), min(py + 5, rows)]]},
+    }
+
+
+def save_level(level, path):
+    with open(path, 'w') as file:
+        json.dump(level, file, indent=1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a level file.')
+    parser.add_argument('kind', choices=generators)
+    parser.add_argument('size', type=int, help='tiles per side, or the columns with --rows')
+    parser.add_argument('--rows', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--npcs', type=int, default=NPC_COUNT)
+    parser.add_argument('--sprites', type=int, default=None)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args()
+
+    level = generate_level(args.kind, args.size, args.rows, args.seed, args.npcs, args.sprites)
+    path = args.out or f"levels/{level['name']}.json"
+    save_level(level, path)
+    print(f'{path}: {level["name"]}')
@@ -0,0 +1,122 @@
+import math
+import numpy as np
+from settings import *
+
+
+class NavGraph:
+    ways = (-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (1, -1), (1, 1), (-1, 1)
+
+    def __init__(self, grid, corner_cutting=PATH_CORNER_CUTTING, arrays=None):
+        self.cols, self.rows = grid.shape
+        self.size = self.cols * self.rows
+        self.corner_cutting = corner_cutting
+        if arrays is None:
+            self.free = (np.asarray(grid) == 0).ravel()
+            # padded (ELL) adjacency, not CSR: every tile, walls included, has 8 int32 slots and node i keeps
+            # its neighbour ids in neighbours[i, :degrees[i]], -1 after that.
+            # that is 34 bytes per tile with the free flags, 34 MiB at 1024x1024. CSR over the free tiles would cost
+            # 4 bytes of offset plus 4 per edge, so it only saves memory on maps that are mostly wall.
+            # the fixed stride lets a door or push wall rewrite a row in place, where CSR would shift the edges of
+            # every later tile, and lets the flow field gather a whole frontier with neighbours[frontier]
+            self.neighbours = np.full((self.size, len(self.ways)), -1, dtype=np.int32)
+            self.degrees = np.zeros(self.size, dtype=np.uint8)
+            self.build()
+        else:
+            self.free, self.neighbours, self.degrees = arrays
+        self.get_views()
+
+    @classmethod
+    def load(cls, level, grid, corner_cutting=PATH_CORNER_CUTTING):
+        # the graph of a level as first loaded, built once and then read from the level cache
+        def build():
+            nav = cls(grid, corner_cutting)
+            return nav.free, nav.neighbours, nav.degrees
+        names = [f'nav_{int(corner_cutting)}_{name}' for name in ('free', 'neighbours', 'degrees')]
+        return cls(grid, corner_cutting, level.get_arrays(names, build))
+
+    def get_views(self):
+        self.free_view = memoryview(self.free)
+        self.neighbours_view = memoryview(self.neighbours.reshape(-1))
+        self.degrees_view = memoryview(self.degrees)
+
+    def build(self):
+        free = self.free.reshape(self.cols, self.rows)
+        padded = np.zeros((self.cols + 2, self.rows + 2), dtype=bool)
+        padded[1:-1, 1:-1] = free
+
+        def shifted(dx, dy):
+            return padded[1 + dx:self.cols + 1 + dx, 1 + dy:self.rows + 1 + dy]
+
+        allowed = np.empty((self.cols, self.rows, len(self.ways)), dtype=bool)
+        for k, (dx, dy) in enumerate(self.ways):
+            allowed[..., k] = free & shifted(dx, dy)
+            if dx and dy and not self.corner_cutting:
+                allowed[..., k] &= shifted(dx, 0) & shifted(0, dy)
+
+        ids = np.arange(self.size, dtype=np.int32)
+        targets = ids[:, None] + np.array([dx * self.rows + dy for dx, dy in self.ways], dtype=np.int32)
+        allowed = allowed.reshape(self.size, -1)
+
+        # move the allowed neighbours to the front of each row, keeping the ways order
+        order = np.argsort(~allowed, axis=1, kind='stable')
+        self.neighbours[:] = np.where(np.take_along_axis(allowed, order, 1),
+                                      np.take_along_axis(targets, order, 1), -1)
+        self.degrees[:] = allowed.sum(axis=1)
+
+    def copy(self):
+        nav = NavGraph.__new__(NavGraph)
+        nav.__dict__.update(self.__dict__)
+        nav.free, nav.neighbours, nav.degrees = self.free.copy(), self.neighbours.copy(), self.degrees.copy()
+        nav.get_views()
+        return nav
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['free_view'], state['neighbours_view'], state['degrees_view']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.get_views()
+
+    def inside(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def get_id(self, x, y):
+        return x * self.rows + y
+
+    def get_pos(self, node):
+        return divmod(node, self.rows)
+
+    def is_free(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.free_view[x * self.rows + y]
+
+    def can_move(self, x, y, dx, dy):
+        if not self.is_free(x + dx, y + dy):
+            return False
+        return self.corner_cutting or not (dx and dy) or (self.is_free(x + dx, y) and self.is_free(x, y + dy))
+
+    def get_cost(self, node, next_node):
+        step = abs(next_node - node)
+        return 1 if step == 1 or step == self.rows else math.sqrt(2)
+
+    def get_neighbour_ids(self, node):
+        offset = node * len(self.ways)
+        return self.neighbours_view[offset:offset + self.degrees_view[node]]
+
+    def get_neighbours(self, x, y):
+        return [divmod(node, self.rows) for node in self.get_neighbour_ids(self.get_id(x, y))]
+
+    def update_node(self, x, y):
+        node = self.get_id(x, y)
+        row = []
+        if self.free_view[node]:
+            row = [self.get_id(x + dx, y + dy) for dx, dy in self.ways if self.can_move(x, y, dx, dy)]
+        self.neighbours[node] = row + [-1] * (len(self.ways) - len(row))
+        self.degrees[node] = len(row)
+
+    def update_tile(self, x, y, free):
+        self.free[self.get_id(x, y)] = free
+        for dx, dy in ((0, 0),) + self.ways:
+            if self.inside(x + dx, y + dy):
+                self.update_node(x + dx, y + dy)
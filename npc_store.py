@@ -0,0 +1,239 @@
+import math
+import numpy as np
+import pygame as pg
+from settings import *
+
+IDLE, WALK, ATTACK, PAIN, DEAD = range(5)
+
+
+class NPCField:
+    # an NPC attribute kept in a column of the NPCStore once the npc is added to it
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, npc, owner=None):
+        if npc is None:
+            return self
+        if npc.store is None:
+            return npc.__dict__[self.name]
+        return npc.store.views[self.name][npc.index]
+
+    def __set__(self, npc, value):
+        if npc.store is None:
+            npc.__dict__[self.name] = value
+        else:
+            npc.store.arrays[self.name][npc.index] = value
+
+
+class NPCStore:
+    fields = {
+        'x': np.float64, 'y': np.float64, 'dx': np.float64, 'dy': np.float64, 'theta': np.float64,
+        'screen_x': np.float64, 'dist': np.float64, 'norm_dist': np.float64,
+        'prev_x': np.float64, 'prev_y': np.float64,
+        'sprite_half_width': np.float64, 'IMAGE_HALF_WIDTH': np.float64, 'IMAGE_RATIO': np.float64,
+        'SPRITE_SCALE': np.float64,
+        'health': np.float64, 'speed': np.float64, 'size': np.float64, 'attack_dist': np.float64,
+        'attack_damage': np.int64, 'accuracy': np.float64,
+        'alive': bool, 'pain': bool, 'ray_cast_value': bool, 'batch_ray_cast_value': bool,
+        'player_search_trigger': bool, 'animation_trigger': bool,
+        'animation_time': np.float64, 'animation_time_prev': np.float64, 'frame_counter': np.int64,
+        'frame_index': np.int64, 'death_frames': np.int64, 'state': np.uint8,
+    }
+
+    def __init__(self, game):
+        self.game = game
+        self.npcs = []
+        self.count = 0
+        self.arrays = {name: np.zeros(0, dtype=dtype) for name, dtype in self.fields.items()}
+        self.get_views()
+
+    def get_views(self):
+        self.views = {name: memoryview(array) for name, array in self.arrays.items()}
+
+    def get(self, *names):
+        return [self.arrays[name][:self.count] for name in names]
+
+    def add(self, npc):
+        if self.count == len(self.arrays['x']):
+            size = max(16, 2 * self.count)
+            for name, array in self.arrays.items():
+                self.arrays[name] = np.zeros(size, dtype=array.dtype)
+                self.arrays[name][:self.count] = array[:self.count]
+            self.get_views()
+
+        npc.index = self.count
+        for name in self.fields:
+            if name in npc.__dict__:
+                self.arrays[name][npc.index] = npc.__dict__.pop(name)
+        self.arrays['death_frames'][npc.index] = len(npc.death_images) - 1
+        self.arrays['prev_x'][npc.index] = self.arrays['x'][npc.index]
+        self.arrays['prev_y'][npc.index] = self.arrays['y'][npc.index]
+        npc.store = self
+        self.npcs.append(npc)
+        self.count += 1
+
+    def update_positions(self, spatial_hash):
+        x, y, alive = self.get('x', 'y', 'alive')
+        spatial_hash.update(x.astype(int), y.astype(int), alive)
+        if NPC_HASH_CHECK:
+            spatial_hash.check(x, y, alive, radius=NPC_SEPARATION_RADIUS)
+
+    def get_separation(self, ids):
+        # push away from npcs closer than NPC_SEPARATION_RADIUS, stronger the closer they are
+        x, y = self.get('x', 'y')
+        push_x, push_y = np.zeros(self.count), np.zeros(self.count)
+        if NPC_SEPARATION:
+            i, j = self.game.object_handler.npc_positions.get_pairs(ids, x, y, NPC_SEPARATION_RADIUS)
+            dx, dy = x[i] - x[j], y[i] - y[j]
+            # npcs on the very same spot split along x by index
+            dx[(dx == 0) & (dy == 0)] = np.sign(i - j)[(dx == 0) & (dy == 0)] * 1e-3
+            dist = np.hypot(dx, dy)
+            weight = NPC_SEPARATION * (1 - dist / NPC_SEPARATION_RADIUS) / dist
+            np.add.at(push_x, i, dx * weight)
+            np.add.at(push_y, i, dy * weight)
+        return push_x[ids], push_y[ids]
+
+    def save_poses(self):
+        x, y, prev_x, prev_y = self.get('x', 'y', 'prev_x', 'prev_y')
+        prev_x[:], prev_y[:] = x, y
+
+    def interpolate(self, alpha):
+        # move npcs to their poses between the last two ticks, returns the simulated ones
+        x, y, prev_x, prev_y = self.get('x', 'y', 'prev_x', 'prev_y')
+        positions = x.copy(), y.copy()
+        x[:] = prev_x + (x - prev_x) * alpha
+        y[:] = prev_y + (y - prev_y) * alpha
+        return positions
+
+    def restore(self, positions):
+        x, y = self.get('x', 'y')
+        x[:], y[:] = positions
+
+    def update(self, active):
+        if not self.count:
+            return
+        self.check_animation_time(active)
+        self.run_logic(active)
+
+    def check_animation_time(self, active):
+        trigger, time_prev, animation_time = self.get('animation_trigger', 'animation_time_prev', 'animation_time')
+        time_now = self.game.sim_time
+        trigger[:] = active & (time_now - time_prev > animation_time)
+        time_prev[trigger] = time_now
+
+    def get_sprites(self, project=False):
+        player = self.game.player
+        x, y, dx, dy, theta, screen_x, dist, norm_dist, half_width = self.get(
+            'x', 'y', 'dx', 'dy', 'theta', 'screen_x', 'dist', 'norm_dist', 'IMAGE_HALF_WIDTH')
+        dx[:] = x - player.x
+        dy[:] = y - player.y
+        theta[:] = np.arctan2(dy, dx)
+
+        delta = theta - player.angle
+        delta[((dx > 0) & (player.angle > math.pi)) | ((dx < 0) & (dy < 0))] += math.tau
+
+        screen_x[:] = (HALF_NUM_RAYS + delta / DELTA_ANGLE) * SCALE
+        dist[:] = np.hypot(dx, dy)
+        norm_dist[:] = dist * np.cos(delta)
+
+        if not project:
+            return
+
+        # only npcs in front of the player are projected, one at a time
+        on_screen = (-half_width < screen_x) & (screen_x < WIDTH + half_width) & (norm_dist > 0.5)
+        for i in np.flatnonzero(on_screen).tolist():
+            npc = self.npcs[i]
+            if self.game.object_handler.can_see(npc.x, npc.y):
+                npc.get_sprite_projection()
+
+    def update_line_of_sight(self, ids=None):
+        x, y, alive, batch_ray_cast_value = self.get('x', 'y', 'alive', 'batch_ray_cast_value')
+        ids = np.flatnonzero(alive) if ids is None else ids
+        if ids.size:
+            visible, _ = self.game.raycasting.get_line_of_sight(np.column_stack((x[ids], y[ids])))
+            batch_ray_cast_value[ids] = visible
+
+    def get_line_of_sight(self, alive):
+        x, y, ray_cast_value = self.get('x', 'y', 'ray_cast_value')
+        ids = np.flatnonzero(alive)
+        ray_cast_value[ids] = False
+        if self.game.visibility:
+            states = self.game.visibility.get_states(self.game.player.map_pos, x[ids].astype(int), y[ids].astype(int))
+            ray_cast_value[ids] = states == 1
+            ids = ids[states < 0]
+
+        if NPC_LOS_BATCH:
+            self.update_line_of_sight(ids)
+            ray_cast_value[ids] = self.arrays['batch_ray_cast_value'][ids]
+        else:
+            for i in ids.tolist():
+                ray_cast_value[i] = self.npcs[i].ray_cast_player_npc()
+
+    def run_logic(self, active):
+        # npcs left out by the AIScheduler keep their state until their next update
+        alive = self.get('alive')[0] & active
+        dead = ~self.get('alive')[0] & active
+        self.get_line_of_sight(alive)
+        pain, ray_cast_value, search, dist, attack_dist, trigger, state = self.get(
+            'pain', 'ray_cast_value', 'player_search_trigger', 'dist', 'attack_dist', 'animation_trigger', 'state')
+
+        seen = alive & ~pain & ray_cast_value
+        search |= seen
+        state[dead] = DEAD
+        state[alive & pain] = PAIN
+        state[alive & ~pain & ~search] = IDLE
+        state[alive & ~pain & search] = WALK
+        state[seen & (dist < attack_dist)] = ATTACK
+
+        for i in np.flatnonzero(alive & trigger).tolist():
+            npc = self.npcs[i]
+            if state[i] == PAIN:
+                npc.animate_pain()
+            elif state[i] == ATTACK:
+                npc.animate(npc.attack_images)
+                npc.attack()
+            elif state[i] == WALK:
+                npc.animate(npc.walk_images)
+            else:
+                npc.animate(npc.idle_images)
+
+        self.movement(np.flatnonzero(alive & (state == WALK)))
+
+        if self.game.global_trigger:
+            frame_counter, death_frames = self.get('frame_counter', 'death_frames')
+            for i in np.flatnonzero(dead & (frame_counter < death_frames)).tolist():
+                self.npcs[i].animate_death()
+
+    def get_next_tiles(self, ids):
+        x, y = self.get('x', 'y')
+        tile_x, tile_y = x[ids].astype(int), y[ids].astype(int)
+        goal = self.game.player.map_pos
+        if PATH_SEARCH != 'flow_field' or self.game.path_service.enabled:
+            next_tiles = [self.npcs[i].get_next_pos() for i in ids.tolist()]
+            return np.array(next_tiles, dtype=int).reshape(-1, 2).T
+
+        pathfinding = self.game.pathfinding
+        pathfinding.update_flow_field(goal)
+        nodes = tile_x * pathfinding.nav.rows + tile_y
+        next_nodes = pathfinding.get_flow_steps(nodes)
+        at_goal = (next_nodes < 0) | (next_nodes == nodes)
+        next_x, next_y = np.divmod(next_nodes, pathfinding.nav.rows)
+        return np.where(at_goal, goal[0], next_x), np.where(at_goal, goal[1], next_y)
+
+    def movement(self, ids):
+        if not ids.size:
+            return
+        x, y, speed, size = self.get('x', 'y', 'speed', 'size')
+        next_x, next_y = self.get_next_tiles(ids)
+
+        free = self.game.object_handler.npc_positions.counts[next_x * self.game.map.rows + next_y] == 0
+        ids, next_x, next_y = ids[free], next_x[free], next_y[free]
+
+        angle = np.arctan2(next_y + 0.5 - y[ids], next_x + 0.5 - x[ids])
+        push_x, push_y = self.get_separation(ids)
+        dx = (np.cos(angle) + push_x) * speed[ids]
+        dy = (np.sin(angle) + push_y) * speed[ids]
+
+        # check_wall_collision, x first and then y from the new x
+        x[ids] += np.where(self.game.map.get_tiles(x[ids] + dx * size[ids], y[ids]) == 0, dx, 0)
+        y[ids] += np.where(self.game.map.get_tiles(x[ids], y[ids] + dy * size[ids]) == 0, dy, 0)
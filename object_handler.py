@@ -1,84 +1,122 @@
-from sprite_object import *
-from npc import *
-from random import choices, randrange
-
-
-class ObjectHandler:
-    def __init__(self, game):
-        self.game = game
-        self.sprite_list = []
-        self.npc_list = []
-        self.npc_sprite_path = 'resources/sprites/npc/'
-        self.static_sprite_path = 'resources/sprites/static_sprites/'
-        self.anim_sprite_path = 'resources/sprites/animated_sprites/'
-        add_sprite = self.add_sprite
-        add_npc = self.add_npc
-        self.npc_positions = {}
-
-        # spawn npc
-        self.enemies = 20  # npc count
-        self.npc_types = [SoldierNPC, CacoDemonNPC, CyberDemonNPC]
-        self.weights = [70, 20, 10]
-        self.restricted_area = {(i, j) for i in range(10) for j in range(10)}
-        self.spawn_npc()
-
-        # sprite map
-        add_sprite(AnimatedSprite(game))
-        add_sprite(AnimatedSprite(game, pos=(1.5, 1.5)))
-        add_sprite(AnimatedSprite(game, pos=(1.5, 7.5)))
-        add_sprite(AnimatedSprite(game, pos=(5.5, 3.25)))
-        add_sprite(AnimatedSprite(game, pos=(5.5, 4.75)))
-        add_sprite(AnimatedSprite(game, pos=(7.5, 2.5)))
-        add_sprite(AnimatedSprite(game, pos=(7.5, 5.5)))
-        add_sprite(AnimatedSprite(game, pos=(14.5, 1.5)))
-        add_sprite(AnimatedSprite(game, pos=(14.5, 4.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(14.5, 5.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(14.5, 7.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(12.5, 7.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(9.5, 7.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(14.5, 12.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(9.5, 20.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(10.5, 20.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(3.5, 14.5)))
-        add_sprite(AnimatedSprite(game, path=self.anim_sprite_path + 'red_light/0.png', pos=(3.5, 18.5)))
-        add_sprite(AnimatedSprite(game, pos=(14.5, 24.5)))
-        add_sprite(AnimatedSprite(game, pos=(14.5, 30.5)))
-        add_sprite(AnimatedSprite(game, pos=(1.5, 30.5)))
-        add_sprite(AnimatedSprite(game, pos=(1.5, 24.5)))
-
-        # npc map
-        # add_npc(SoldierNPC(game, pos=(11.0, 19.0)))
-        # add_npc(SoldierNPC(game, pos=(11.5, 4.5)))
-        # add_npc(SoldierNPC(game, pos=(13.5, 6.5)))
-        # add_npc(SoldierNPC(game, pos=(2.0, 20.0)))
-        # add_npc(SoldierNPC(game, pos=(4.0, 29.0)))
-        # add_npc(CacoDemonNPC(game, pos=(5.5, 14.5)))
-        # add_npc(CacoDemonNPC(game, pos=(5.5, 16.5)))
-        # add_npc(CyberDemonNPC(game, pos=(14.5, 25.5)))
-
-    def spawn_npc(self):
-        for i in range(self.enemies):
-                npc = choices(self.npc_types, self.weights)[0]
-                pos = x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
-                while (pos in self.game.map.world_map) or (pos in self.restricted_area):
-                    pos = x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
-                self.add_npc(npc(self.game, pos=(x + 0.5, y + 0.5)))
-
-    def check_win(self):
-        if not len(self.npc_positions):
-            self.game.object_renderer.win()
-            pg.display.flip()
-            pg.time.delay(1500)
-            self.game.new_game()
-
-    def update(self):
-        self.npc_positions = {npc.map_pos for npc in self.npc_list if npc.alive}
-        [sprite.update() for sprite in self.sprite_list]
-        [npc.update() for npc in self.npc_list]
-        self.check_win()
-
-    def add_npc(self, npc):
-        self.npc_list.append(npc)
-
-    def add_sprite(self, sprite):
-        self.sprite_list.append(sprite)
\ No newline at end of file
+from sprite_object import *
+from npc import *
+from spatial_hash import *
+from ai_scheduler import *
+from spawner import *
+from chunks import *
+from random import choices
+from inspect import signature
+
+
+class ObjectHandler:
+    def __init__(self, game):
+        self.game = game
+        self.sprite_list = []
+        self.npc_list = []
+        self.npc_sprite_path = 'resources/sprites/npc/'
+        self.static_sprite_path = 'resources/sprites/static_sprites/'
+        self.anim_sprite_path = 'resources/sprites/animated_sprites/'
+        self.npc_positions = SpatialHash(game.map.cols, game.map.rows)  # tiles of living npcs
+        self.npc_store = NPCStore(game)
+        self.ai_scheduler = AIScheduler(game)
+        self.visible_area = None
+        self.chunks = ChunkManager(game)
+        self.npc_stats = {}
+        self.npc_types = [SoldierNPC, CacoDemonNPC, CyberDemonNPC]
+        self.sprite_types = [SpriteObject, AnimatedSprite]
+        level = game.level
+
+        # spawn npc
+        spawn = level.spawn
+        self.enemies = spawn.get('count', NPC_COUNT)
+        weights = spawn.get('weights', NPC_WEIGHTS)
+        self.weights = [weights.get(npc.__name__, 0) for npc in self.npc_types]
+        self.spawner = Spawner(game, spawn.get('zones', SPAWN_ZONES), spawn.get('exclude', SPAWN_EXCLUDE),
+                               spawn.get('density', SPAWN_DENSITY))
+        self.spawn_npc()
+
+        # sprite and npc map of the level, created as their chunks load
+        sprite_types = {sprite.__name__: sprite for sprite in self.sprite_types}
+        npc_types = {npc.__name__: npc for npc in self.npc_types}
+        for sprite in level.sprites:
+            self.queue(sprite_types[sprite['type']], self.get_args(sprite), self.add_sprite)
+        for npc in level.npcs:
+            self.queue(npc_types[npc['type']], self.get_args(npc), self.add_npc)
+        self.chunks.update()
+
+    def get_args(self, entry):
+        args = {name: value for name, value in entry.items() if name != 'type'}
+        if 'pos' in args:
+            args['pos'] = tuple(args['pos'])
+        return args
+
+    def queue(self, cls, args, add):
+        # sprites are created again each time their chunk loads, npcs only once and then kept
+        pos = args.get('pos', signature(cls).parameters['pos'].default)
+        self.chunks.add(pos, lambda game: add(cls(game, **args)), keep=add == self.add_npc)
+
+    def spawn_npc(self):
+        tiles = self.spawner.draw(self.enemies)
+        for npc, (x, y) in zip(choices(self.npc_types, self.weights, k=len(tiles)), tiles):
+            self.queue(npc, {'pos': (x + 0.5, y + 0.5)}, self.add_npc)
+
+    def check_win(self):
+        if not len(self.npc_positions) and not self.chunks.pending:
+            self.game.win()
+
+    def set_npc_stats(self, npc_stats):
+        # npc_stats maps 'name' or 'NPCType.name' to a value, npcs created later get them too
+        self.npc_stats = npc_stats
+        for npc in self.npc_list:
+            self.apply_npc_stats(npc)
+
+    def apply_npc_stats(self, npc):
+        for key, value in self.npc_stats.items():
+            npc_type, _, name = key.rpartition('.')
+            if not npc_type or npc_type == type(npc).__name__:
+                setattr(npc, name, value)
+
+    def update(self):
+        self.chunks.update()
+        self.npc_store.update_positions(self.npc_positions)
+        self.game.path_service.update()
+        if self.game.player.shot:
+            self.game.weapon.fire()
+        [sprite.update() for sprite in self.sprite_list]
+        self.npc_store.get_sprites()
+        active = self.ai_scheduler.get_active()
+        if NPC_UPDATE == 'batch':
+            self.npc_store.update(active)
+        else:
+            ids = np.flatnonzero(active)
+            if NPC_LOS_BATCH:
+                self.npc_store.update_line_of_sight(ids[self.npc_store.get('alive')[0][ids]])
+            [self.npc_list[i].update() for i in ids.tolist()]
+        self.check_win()
+
+    def project_sprites(self):
+        if self.game.visibility:
+            self.visible_area = self.game.visibility.get_visible_area(self.game.player.map_pos)
+        [sprite.get_sprite() for sprite in self.sprite_list]
+        self.npc_store.get_sprites(project=True)
+
+    def can_see(self, x, y):
+        # sprites outside the visible area of the player's tile are not projected
+        if self.visible_area is None:
+            return True
+        px, py = self.game.player.map_pos
+        radius = self.game.visibility.radius
+        dx, dy = int(x) - px + radius, int(y) - py + radius
+        if not (0 <= dx < len(self.visible_area) and 0 <= dy < len(self.visible_area)):
+            return True
+        return self.visible_area[dx, dy]
+
+    def add_npc(self, npc):
+        self.npc_list.append(npc)
+        self.npc_store.add(npc)
+        self.apply_npc_stats(npc)
+        return npc
+
+    def add_sprite(self, sprite):
+        self.sprite_list.append(sprite)
+        return sprite
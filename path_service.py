@@ -0,0 +1,107 @@
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from pathfinding import GridSearch
+from settings import *
+
+worker = threading.local()  # the search of each worker thread, or of the one thread of a worker process
+
+
+def init_worker(nav):
+    # thread workers are handed the same snapshot, each one changes and searches its own copy
+    worker.search = GridSearch(nav.copy())
+    worker.changes = 0  # tile changes applied to the worker's nav graph
+
+
+def find_path(search, start, goal, blocked, changes=()):
+    # changes are the (x, y, free) tiles changed since the snapshot, each worker applies the ones it hasn't yet
+    for x, y, free in changes[worker.changes:]:
+        worker.search.nav.update_tile(x, y, free)
+    worker.changes = max(worker.changes, len(changes))
+    return worker.search.find_path(search, start, goal, blocked)
+
+
+class PathService:
+    def __init__(self, game):
+        self.game = game
+        self.pathfinding = game.pathfinding
+        self.enabled = game.path_async and PATH_SEARCH in self.pathfinding.searches
+        self.executor = None
+        self.changes = []  # tile changes since the workers' snapshot of the nav graph
+        self.pending = {}  # npc -> (future, start, goal)
+        self.routes = {}  # npc -> (goal, {tile: next tile})
+        self.budget = 0
+        game.map.add_listener(self.update_tile)
+
+    def get_executor(self):
+        # workers search a copy of the nav graph, tile changes are sent along with the requests
+        # until there are enough of them to make a fresh copy worth it
+        if self.executor is None or len(self.changes) > PATH_WORKER_CHANGES:
+            self.close()
+            self.changes = []
+            snapshot = self.pathfinding.nav.copy()
+            if PATH_WORKER == 'process':
+                self.executor = ProcessPoolExecutor(PATH_WORKERS, multiprocessing.get_context('spawn'),
+                                                    initializer=init_worker, initargs=(snapshot,))
+            else:
+                self.executor = ThreadPoolExecutor(PATH_WORKERS, initializer=init_worker, initargs=(snapshot,))
+        return self.executor
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.pending = {}
+
+    def get_steps(self, start, route):
+        if not route:
+            return {start: None}
+        return dict(zip([start] + route[:-1], route))
+
+    def request(self, npc, start, goal):
+        blocked = frozenset(self.game.object_handler.npc_positions)
+        executor = self.get_executor()
+        future = executor.submit(find_path, PATH_SEARCH, start, goal, blocked, tuple(self.changes))
+        self.pending[npc] = future, start, goal
+
+    def find_path_now(self, npc, start, goal):
+        time_start = time.perf_counter()
+        route = self.pathfinding.find_path(PATH_SEARCH, start, goal, self.game.object_handler.npc_positions)
+        self.budget -= time.perf_counter() - time_start
+        self.routes[npc] = goal, self.get_steps(start, route)
+        return self.routes[npc][1][start] or goal
+
+    def get_path(self, npc, start, goal):
+        route_goal, steps = self.routes.get(npc, (None, {}))
+        if npc not in self.pending and (route_goal != goal or start not in steps):
+            if start not in steps and self.budget > 0:
+                return self.find_path_now(npc, start, goal)
+            self.request(npc, start, goal)
+
+        # keep following the last known route until a new one arrives
+        if start in steps:
+            return steps[start] or goal
+        return start
+
+    def update_tile(self, x, y):
+        self.changes.append((x, y, not self.game.map.is_wall(x, y)))
+        # searches still running use the old graph, their npcs ask again
+        for future, start, goal in self.pending.values():
+            future.cancel()
+        self.pending = {}
+        # routes through the tile are searched again, others stay as they are
+        self.routes = {npc: (goal, steps) for npc, (goal, steps) in self.routes.items()
+                       if (x, y) not in steps and (x, y) not in steps.values()}
+
+    def update(self):
+        if not self.enabled:
+            return
+        self.budget = PATH_FRAME_BUDGET / 1000
+        for npc, (future, start, goal) in list(self.pending.items()):
+            if future.done():
+                del self.pending[npc]
+                if not future.cancelled() and future.exception() is None:
+                    self.routes[npc] = goal, self.get_steps(start, future.result())
+        for npc in [npc for npc in self.routes if not npc.alive]:
+            del self.routes[npc]
@@ -1,47 +1,346 @@
-from collections import deque
-from functools import lru_cache
-
-
-class PathFinding:
-    def __init__(self, game):
-        self.game = game
-        self.map = game.map.mini_map
-        self.ways = [-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [1, -1], [1, 1], [-1, 1]
-        self.graph = {}
-        self.get_graph()
-
-    @lru_cache
-    def get_path(self, start, goal):
-        self.visited = self.bfs(start, goal, self.graph)
-        path = [goal]
-        step = self.visited.get(goal, start)
-
-        while step and step != start:
-            path.append(step)
-            step = self.visited[step]
-        return path[-1]
-
-    def bfs(self, start, goal, graph):
-        queue = deque([start])
-        visited = {start: None}
-
-        while queue:
-            cur_node = queue.popleft()
-            if cur_node == goal:
-                break
-            next_nodes = graph[cur_node]
-
-            for next_node in next_nodes:
-                if next_node not in visited and next_node not in self.game.object_handler.npc_positions:
-                    queue.append(next_node)
-                    visited[next_node] = cur_node
-        return visited
-
-    def get_next_nodes(self, x, y):
-        return [(x + dx, y + dy) for dx, dy in self.ways if (x + dx, y + dy) not in self.game.map.world_map]
-
-    def get_graph(self):
-        for y, row in enumerate(self.map):
-            for x, col in enumerate(row):
-                if not col:
-                    self.graph[(x, y)] = self.graph.get((x, y), []) + self.get_next_nodes(x, y)
\ No newline at end of file
+import math
+from collections import deque
+from heapq import heappush, heappop
+import numpy as np
+from settings import *
+from nav_graph import *
+from hierarchical_pathfinding import *
+
+
+class GridSearch:
+    def __init__(self, nav):
+        self.nav = nav
+        self.ways = nav.ways
+        self.searches = {'bfs': self.bfs, 'astar': self.astar, 'jps': self.jps}
+        self.expanded_nodes = 0
+
+    def get_blocked(self, positions):
+        return {self.nav.get_id(x, y) for x, y in positions if self.nav.inside(x, y)}
+
+    def is_blocked(self, node, next_node, goal, blocked):
+        # occupied tiles are walls to every search except at the goal. with corner cutting off
+        # they also block the diagonal steps past them, as walls do in the nav graph
+        if next_node != goal and next_node in blocked:
+            return True
+        if self.nav.corner_cutting or not blocked:
+            return False
+        (x, y), (next_x, next_y) = self.nav.get_pos(node), self.nav.get_pos(next_node)
+        if x == next_x or y == next_y:
+            return False
+        sides = self.nav.get_id(next_x, y), self.nav.get_id(x, next_y)
+        return any(side != goal and side in blocked for side in sides)
+
+    def get_next_step(self, start, goal, visited):
+        start_node, node = self.nav.get_id(*start), self.nav.get_id(*goal)
+        if node not in visited or node == start_node:
+            return goal
+        while visited[node] != start_node:
+            node = visited[node]
+        # jump point searches link nodes that are several tiles apart
+        (x, y), (dx, dy) = start, self.nav.get_pos(node)
+        dx, dy = dx - x, dy - y
+        return x + (dx > 0) - (dx < 0), y + (dy > 0) - (dy < 0)
+
+    def get_route(self, start, goal, visited):
+        node = self.nav.get_id(*goal)
+        if node not in visited:
+            return []
+        nodes = [node]
+        while visited[nodes[-1]] is not None:
+            nodes.append(visited[nodes[-1]])
+
+        # fill in the straight runs between jump points
+        route = []
+        x, y = start
+        for node in reversed(nodes[:-1]):
+            node = self.nav.get_pos(node)
+            while (x, y) != node:
+                dx, dy = node[0] - x, node[1] - y
+                x, y = x + (dx > 0) - (dx < 0), y + (dy > 0) - (dy < 0)
+                route.append((x, y))
+        return route
+
+    def find_path(self, search, start, goal, blocked):
+        if not (self.nav.inside(*start) and self.nav.inside(*goal)):
+            return []
+        visited = self.searches[search](self.nav.get_id(*start), self.nav.get_id(*goal), self.get_blocked(blocked))
+        return self.get_route(start, goal, visited)
+
+    @staticmethod
+    def octile(a, b):
+        dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+        return max(dx, dy) + (math.sqrt(2) - 1) * min(dx, dy)
+
+    def bfs(self, start, goal, blocked):
+        queue = deque([start])
+        visited = {start: None}
+
+        while queue:
+            cur_node = queue.popleft()
+            if cur_node == goal:
+                break
+            self.expanded_nodes += 1
+            next_nodes = self.nav.get_neighbour_ids(cur_node)
+
+            for next_node in next_nodes:
+                if next_node not in visited and not self.is_blocked(cur_node, next_node, goal, blocked):
+                    queue.append(next_node)
+                    visited[next_node] = cur_node
+        return visited
+
+    def astar(self, start, goal, blocked):
+        nav = self.nav
+        goal_pos = nav.get_pos(goal)
+        heap = [(self.octile(nav.get_pos(start), goal_pos), 0, start)]
+        visited = {start: None}
+        costs = {start: 0}
+
+        while heap:
+            _, cost, cur_node = heappop(heap)
+            if cur_node == goal:
+                break
+            if cost > costs[cur_node]:
+                continue
+            self.expanded_nodes += 1
+
+            for next_node in nav.get_neighbour_ids(cur_node):
+                if self.is_blocked(cur_node, next_node, goal, blocked):
+                    continue
+                next_cost = cost + nav.get_cost(cur_node, next_node)
+                if next_cost < costs.get(next_node, math.inf):
+                    costs[next_node] = next_cost
+                    visited[next_node] = cur_node
+                    heappush(heap, (next_cost + self.octile(nav.get_pos(next_node), goal_pos), next_cost, next_node))
+        return visited
+
+    def jps(self, start, goal, blocked):
+        nav = self.nav
+        goal_pos = nav.get_pos(goal)
+
+        # occupied tiles count as walls here, the same rule as is_blocked
+        def walkable(x, y):
+            return nav.is_free(x, y) and (nav.get_id(x, y) not in blocked or (x, y) == goal_pos)
+
+        heap = [(self.octile(nav.get_pos(start), goal_pos), 0, start)]
+        visited = {start: None}
+        costs = {start: 0}
+
+        while heap:
+            _, cost, cur_node = heappop(heap)
+            if cur_node == goal:
+                break
+            if cost > costs[cur_node]:
+                continue
+            self.expanded_nodes += 1
+
+            cur_pos = nav.get_pos(cur_node)
+            parent = visited[cur_node]
+            parent_pos = None if parent is None else nav.get_pos(parent)
+            for dx, dy in self.get_jump_directions(cur_pos, parent_pos, walkable):
+                jump_pos = self.jump(cur_pos, dx, dy, goal_pos, walkable)
+                if jump_pos is None:
+                    continue
+                jump_node = nav.get_id(*jump_pos)
+                next_cost = cost + self.octile(cur_pos, jump_pos)
+                if next_cost < costs.get(jump_node, math.inf):
+                    costs[jump_node] = next_cost
+                    visited[jump_node] = cur_node
+                    heappush(heap, (next_cost + self.octile(jump_pos, goal_pos), next_cost, jump_node))
+        return visited
+
+    def get_jump_directions(self, node, parent, walkable):
+        if parent is None:
+            return self.ways
+        x, y = node
+        dx, dy = x - parent[0], y - parent[1]
+        dx, dy = (dx > 0) - (dx < 0), (dy > 0) - (dy < 0)
+
+        if self.nav.corner_cutting:
+            if dx and dy:
+                directions = [(dx, 0), (0, dy), (dx, dy)]
+                if not walkable(x - dx, y):
+                    directions.append((-dx, dy))
+                if not walkable(x, y - dy):
+                    directions.append((dx, -dy))
+            elif dx:
+                directions = [(dx, 0)]
+                if not walkable(x, y + 1):
+                    directions.append((dx, 1))
+                if not walkable(x, y - 1):
+                    directions.append((dx, -1))
+            else:
+                directions = [(0, dy)]
+                if not walkable(x + 1, y):
+                    directions.append((1, dy))
+                if not walkable(x - 1, y):
+                    directions.append((-1, dy))
+            return directions
+
+        # without corner cutting a blocked side only matters once it opens up again
+        if dx and dy:
+            return [(dx, 0), (0, dy), (dx, dy)]
+        if dx:
+            return [(dx, 0), (dx, 1), (dx, -1), (0, 1), (0, -1)]
+        return [(0, dy), (1, dy), (-1, dy), (1, 0), (-1, 0)]
+
+    def can_step(self, x, y, dx, dy, walkable):
+        if not walkable(x + dx, y + dy):
+            return False
+        return self.nav.corner_cutting or not (dx and dy) or (walkable(x + dx, y) and walkable(x, y + dy))
+
+    def jump(self, node, dx, dy, goal, walkable):
+        x, y = node
+        while True:
+            if not self.can_step(x, y, dx, dy, walkable):
+                return None
+            x, y = x + dx, y + dy
+            if (x, y) == goal:
+                return x, y
+
+            if dx and dy:
+                if self.nav.corner_cutting and (
+                        (not walkable(x - dx, y) and walkable(x - dx, y + dy)) or
+                        (not walkable(x, y - dy) and walkable(x + dx, y - dy))):
+                    return x, y
+                if (self.jump((x, y), dx, 0, goal, walkable) is not None or
+                        self.jump((x, y), 0, dy, goal, walkable) is not None):
+                    return x, y
+            elif dx:
+                if self.nav.corner_cutting:
+                    if ((not walkable(x, y + 1) and walkable(x + dx, y + 1)) or
+                            (not walkable(x, y - 1) and walkable(x + dx, y - 1))):
+                        return x, y
+                elif ((walkable(x, y + 1) and not walkable(x - dx, y + 1)) or
+                        (walkable(x, y - 1) and not walkable(x - dx, y - 1))):
+                    return x, y
+            else:
+                if self.nav.corner_cutting:
+                    if ((not walkable(x + 1, y) and walkable(x + 1, y + dy)) or
+                            (not walkable(x - 1, y) and walkable(x - 1, y + dy))):
+                        return x, y
+                elif ((walkable(x + 1, y) and not walkable(x + 1, y - dy)) or
+                        (walkable(x - 1, y) and not walkable(x - 1, y - dy))):
+                    return x, y
+
+
+class PathFinding(GridSearch):
+    def __init__(self, game):
+        self.game = game
+        super().__init__(NavGraph.load(game.level, game.map.grid, PATH_CORNER_CUTTING))
+        self.flow_goal = None
+        self.flow_occupancy = None  # SpatialHash version the flow field was built for
+        self.flow_chunks = None  # ChunkManager version, the field only covers loaded chunks
+        self.flow_field = None
+        self.distances = None
+        self.hierarchy = HierarchicalPathFinding(self) if PATH_SEARCH == 'hpa' else None
+        self.expanded_nodes = 0  # don't count the hierarchy build
+        game.map.add_listener(self.update_tile)
+        if PATH_CHECK:
+            self.check_searches()
+
+    def get_path(self, start, goal):
+        if not (self.nav.inside(*start) and self.nav.inside(*goal)):
+            return goal
+
+        if PATH_SEARCH == 'flow_field':
+            self.update_flow_field(goal)
+            next_node = int(self.get_flow_steps(np.array([self.nav.get_id(*start)]))[0])
+            if next_node < 0 or next_node == self.nav.get_id(*start):
+                return goal
+            return self.nav.get_pos(next_node)
+
+        blocked = self.get_blocked(self.game.object_handler.npc_positions)
+        if PATH_SEARCH == 'hpa':
+            return self.hierarchy.get_next_step(start, goal, blocked)
+
+        visited = self.searches[PATH_SEARCH](self.nav.get_id(*start), self.nav.get_id(*goal), blocked)
+        return self.get_next_step(start, goal, visited)
+
+    def update_flow_field(self, goal):
+        occupancy = self.game.object_handler.npc_positions
+        chunks = self.game.object_handler.chunks
+        if goal == self.flow_goal and chunks.version == self.flow_chunks and (
+                occupancy.version == self.flow_occupancy or not PATH_OCCUPANCY_REBUILD):
+            return
+        self.flow_goal, self.flow_occupancy, self.flow_chunks = goal, occupancy.version, chunks.version
+        self.flow_field, self.distances = self.get_flow_field(
+            goal, occupancy if PATH_OCCUPANCY_REBUILD else (), chunks.get_tiles())
+
+    def get_flow_steps(self, nodes):
+        # next node of each of nodes down the flow field
+        steps = self.flow_field[nodes]
+        if PATH_OCCUPANCY_REBUILD:
+            return steps
+        # the field only knows the walls, an npc in the way is walked around when that is less than
+        # PATH_OCCUPIED_COST steps longer, otherwise the step stays and movement waits for the tile to clear
+        occupied = self.game.object_handler.npc_positions.counts > 0
+        blocked = np.flatnonzero((steps >= 0) & (steps != nodes) & occupied[steps])
+        if blocked.size:
+            neighbours = self.nav.neighbours[nodes[blocked]]
+            distances = np.where(neighbours >= 0, self.distances[neighbours], -1)
+            costs = np.where(distances >= 0, distances + PATH_OCCUPIED_COST * occupied[neighbours], np.inf)
+            best = costs.argmin(axis=1)
+            detour = costs[np.arange(blocked.size), best] < self.distances[steps[blocked]] + PATH_OCCUPIED_COST
+            steps[blocked[detour]] = neighbours[detour, best[detour]]
+        return steps
+
+    def get_flow_field(self, goal, occupancy, loaded=None):
+        flow_field = np.full(self.nav.size, -1, dtype=np.int32)
+        distances = np.full(self.nav.size, -1, dtype=np.int32)
+        goal = self.nav.get_id(*goal)
+        flow_field[goal], distances[goal] = goal, 0
+
+        # occupied tiles get a direction but nothing is routed through them
+        blocked = np.zeros(self.nav.size, dtype=bool)
+        blocked[list(self.get_blocked(occupancy))] = True
+        # frozen npcs don't move, so the search stops at the border of the loaded chunks
+        if loaded is not None:
+            blocked |= ~loaded
+        blocked[goal] = False
+        corners = not self.nav.corner_cutting and blocked.any()
+
+        frontier = np.array([goal], dtype=np.int32)
+        distance = 0
+        while frontier.size:
+            distance += 1
+            next_nodes = self.nav.neighbours[frontier]
+            parents = np.broadcast_to(frontier[:, None], next_nodes.shape)
+            new = next_nodes >= 0
+            new[new] = distances[next_nodes[new]] < 0
+            if corners:
+                # and with corner cutting off nothing steps diagonally past them, as in is_blocked
+                x, y = np.divmod(parents[new], self.nav.rows)
+                next_x, next_y = np.divmod(next_nodes[new], self.nav.rows)
+                new[new] = (x == next_x) | (y == next_y) | ~(
+                    blocked[next_x * self.nav.rows + y] | blocked[x * self.nav.rows + next_y])
+            next_nodes, first = np.unique(next_nodes[new], return_index=True)
+            flow_field[next_nodes] = parents[new][first]
+            distances[next_nodes] = distance
+            frontier = next_nodes[~blocked[next_nodes]]
+        return flow_field, distances
+
+    def update_tile(self, x, y):
+        self.nav.update_tile(x, y, not self.game.map.is_wall(x, y))
+        self.flow_goal = None
+        if self.hierarchy:
+            self.hierarchy.update_tile(x, y)
+        if PATH_CHECK:
+            self.check_searches()
+
+    def check_searches(self, count=20, tolerance=1e-6):
+        # A* is exact, so jump point search must find routes of the same cost and bfs must reach the same goals
+        free = np.flatnonzero(self.nav.free)
+        if free.size < 2:
+            return
+        blocked = self.get_blocked(self.game.object_handler.npc_positions)
+        for start, goal in np.random.default_rng().choice(free, (count, 2)).tolist():
+            start_pos, goal_pos = self.nav.get_pos(start), self.nav.get_pos(goal)
+            costs = {}
+            for search in ('astar', 'jps', 'bfs'):
+                visited = self.searches[search](start, goal, blocked)
+                route = [start_pos] + self.get_route(start_pos, goal_pos, visited)
+                costs[search] = sum(map(self.octile, route, route[1:])) if goal in visited else None
+            expected = costs['astar']
+            if (costs['bfs'] is None) != (expected is None) or (costs['jps'] is None) != (expected is None) or (
+                    expected is not None and abs(costs['jps'] - expected) > tolerance):
+                print(f"Error: route {start_pos} -> {goal_pos} mismatch, got {costs}")
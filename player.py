@@ -1,126 +1,141 @@
-import math
-import pygame as pg
-from settings import *
-
-class Player:
-    def __init__(self, game):
-        self.game = game
-        self.x, self.y = PLAYER_POS
-        self.angle = PLAYER_ANGLE
-        self.vert_angle = 0  # Vertical angle for up/down view (pitch)
-        self.shot = False
-        self.health = 100
-        self.rel = 0
-        self.health_recovery_delay = 700
-        self.time_prev = pg.time.get_ticks()
-        self.diag_move_corr = 1 / math.sqrt(2)
-
-    def recover_health(self):
-        if self.check_health_recovery_delay() and self.health < 100:
-            self.health += 1
-
-    def check_health_recovery_delay(self):
-        time_now = pg.time.get_ticks()
-        if time_now - self.time_prev > self.health_recovery_delay:
-            self.time_prev = time_now
-            return True
-
-    def check_game_over(self):
-        if self.health <= 0:
-            self.game.game_over()
-
-    def get_damage(self, damage):
-        self.health -= damage
-        self.game.object_renderer.player_damage()
-        self.game.sound.player_pain.play()
-        self.check_game_over()
-
-    def take_damage(self, amount):
-        self.health -= amount
-        if self.health < 0:
-            self.health = 0
-
-    def single_fire_event(self, event):
-        if event.type == pg.MOUSEBUTTONDOWN:
-            if event.button == 1 and not self.shot and not self.game.weapon.reloading:
-                self.shot = True
-                self.game.weapon.reloading = True
-                self.game.weapon.sound.play()  # Play sound of the currently equipped weapon
-
-    def movement(self):
-        sin_a = math.sin(self.angle)
-        cos_a = math.cos(self.angle)
-        dx, dy = 0, 0
-        speed = PLAYER_SPEED * self.game.delta_time
-        speed_sin = speed * sin_a
-        speed_cos = speed * cos_a
-
-        keys = pg.key.get_pressed()
-        num_key_pressed = -1
-        if keys[pg.K_w]:
-            num_key_pressed += 1
-            dx += speed_cos
-            dy += speed_sin
-        if keys[pg.K_s]:
-            num_key_pressed += 1
-            dx += -speed_cos
-            dy += -speed_sin
-        if keys[pg.K_a]:
-            num_key_pressed += 1
-            dx += speed_sin
-            dy += -speed_cos
-        if keys[pg.K_d]:
-            num_key_pressed += 1
-            dx += -speed_sin
-            dy += speed_cos
-
-        if num_key_pressed:
-            dx *= self.diag_move_corr
-            dy *= self.diag_move_corr
-
-        self.check_wall_collision(dx, dy)
-
-        self.angle %= math.tau
-
-    def check_wall(self, x, y):
-        return (x, y) not in self.game.map.world_map
-
-    def check_wall_collision(self, dx, dy):
-        scale = PLAYER_SIZE_SCALE / self.game.delta_time
-        if self.check_wall(int(self.x + dx * scale), int(self.y)):
-            self.x += dx
-        if self.check_wall(int(self.x), int(self.y + dy * scale)):
-            self.y += dy
-
-    def draw(self):
-        pg.draw.line(self.game.screen, 'yellow', (self.x * 100, self.y * 100),
-                     (self.x * 100 + WIDTH * math.cos(self.angle),
-                      self.y * 100 + WIDTH * math.sin(self.angle)), 2)
-        pg.draw.circle(self.game.screen, 'green', (self.x * 100, self.y * 100), 15)
-
-    def mouse_control(self):
-        mx, my = pg.mouse.get_pos()
-
-        if mx < MOUSE_BORDER_LEFT or mx > MOUSE_BORDER_RIGHT:
-            pg.mouse.set_pos([HALF_WIDTH, HALF_HEIGHT])
-
-        self.rel = pg.mouse.get_rel()[0]
-        self.rel = max(-MOUSE_MAX_REL, min(MOUSE_MAX_REL, self.rel))
-        self.angle += self.rel * MOUSE_SENSITIVITY * self.game.delta_time
-
-        my_rel = pg.mouse.get_rel()[1]
-        self.vert_angle -= my_rel * MOUSE_SENSITIVITY * self.game.delta_time
-        self.vert_angle = max(min(self.vert_angle, math.pi / 4), -math.pi / 4)
-
-    def update(self):
-        self.movement()
-        self.mouse_control()
-        self.recover_health()
-
-    @property
-    def pos(self):
-        return self.x, self.y
-
-    @property
-    def map_pos(self):
+import math
+import pygame as pg
+from settings import *
+
+class Player:
+    def __init__(self, game):
+        self.game = game
+        self.x, self.y = game.level.player_pos
+        self.angle = game.level.player_angle
+        self.vert_angle = 0  # Vertical angle for up/down view (pitch)
+        self.shot = False
+        self.using = False
+        self.health = 100
+        self.damage_taken = 0
+        self.rel = 0
+        self.health_recovery_delay = 700
+        self.time_prev = game.sim_time
+        self.diag_move_corr = 1 / math.sqrt(2)
+        self.prev_pose = self.x, self.y, self.angle
+
+    def recover_health(self):
+        if self.check_health_recovery_delay() and self.health < 100:
+            self.health += 1
+
+    def check_health_recovery_delay(self):
+        time_now = self.game.sim_time
+        if time_now - self.time_prev > self.health_recovery_delay:
+            self.time_prev = time_now
+            return True
+
+    def check_game_over(self):
+        if self.health <= 0:
+            self.game.game_over()
+
+    def get_damage(self, damage):
+        self.health -= damage
+        self.damage_taken += damage
+        self.game.object_renderer.player_damage()
+        self.game.sound.player_pain.play()
+        self.check_game_over()
+
+    def take_damage(self, amount):
+        self.health -= amount
+        if self.health < 0:
+            self.health = 0
+
+    def fire(self):
+        if not self.shot and not self.game.weapon.reloading:
+            self.shot = True
+            self.game.weapon.reloading = True
+            self.game.weapon.sound.play()  # Play sound of the currently equipped weapon
+
+    def use(self):
+        # doors and push walls are used once per key press
+        using = self.game.input.get_keys()[pg.K_e]
+        if using and not self.using:
+            self.game.doors.use(self.x, self.y, self.angle)
+        self.using = using
+
+    def movement(self):
+        sin_a = math.sin(self.angle)
+        cos_a = math.cos(self.angle)
+        dx, dy = 0, 0
+        speed = PLAYER_SPEED * self.game.delta_time
+        speed_sin = speed * sin_a
+        speed_cos = speed * cos_a
+
+        keys = self.game.input.get_keys()
+        num_key_pressed = -1
+        if keys[pg.K_w]:
+            num_key_pressed += 1
+            dx += speed_cos
+            dy += speed_sin
+        if keys[pg.K_s]:
+            num_key_pressed += 1
+            dx += -speed_cos
+            dy += -speed_sin
+        if keys[pg.K_a]:
+            num_key_pressed += 1
+            dx += speed_sin
+            dy += -speed_cos
+        if keys[pg.K_d]:
+            num_key_pressed += 1
+            dx += -speed_sin
+            dy += speed_cos
+
+        if num_key_pressed:
+            dx *= self.diag_move_corr
+            dy *= self.diag_move_corr
+
+        self.check_wall_collision(dx, dy)
+
+        self.angle %= math.tau
+
+    def check_wall(self, x, y):
+        return not self.game.map.is_wall(x, y)
+
+    def check_wall_collision(self, dx, dy):
+        scale = PLAYER_SIZE_SCALE / self.game.delta_time
+        if self.check_wall(int(self.x + dx * scale), int(self.y)):
+            self.x += dx
+        if self.check_wall(int(self.x), int(self.y + dy * scale)):
+            self.y += dy
+
+    def draw(self):
+        pg.draw.line(self.game.screen, 'yellow', (self.x * 100, self.y * 100),
+                     (self.x * 100 + WIDTH * math.cos(self.angle),
+                      self.y * 100 + WIDTH * math.sin(self.angle)), 2)
+        pg.draw.circle(self.game.screen, 'green', (self.x * 100, self.y * 100), 15)
+
+    def mouse_control(self):
+        self.rel, my_rel = self.game.input.get_mouse_rel()
+        self.rel = max(-MOUSE_MAX_REL, min(MOUSE_MAX_REL, self.rel))
+        self.angle += self.rel * MOUSE_SENSITIVITY * self.game.delta_time
+
+        self.vert_angle -= my_rel * MOUSE_SENSITIVITY * self.game.delta_time
+        self.vert_angle = max(min(self.vert_angle, math.pi / 4), -math.pi / 4)
+
+    def update(self):
+        if self.game.input.get_fire():
+            self.fire()
+        self.use()
+        self.movement()
+        self.mouse_control()
+        self.recover_health()
+
+    def save_pose(self):
+        self.prev_pose = self.x, self.y, self.angle
+
+    def get_pose(self, alpha):
+        x, y, angle = self.prev_pose
+        turn = (self.angle - angle + math.pi) % math.tau - math.pi
+        return x + (self.x - x) * alpha, y + (self.y - y) * alpha, angle + turn * alpha
+
+    @property
+    def pos(self):
+        return self.x, self.y
+
+    @property
+    def map_pos(self):
         return int(self.x), int(self.y)
\ No newline at end of file
@@ -1,105 +1,289 @@
-import pygame as pg
-import math
-from settings import *
-
-
-class RayCasting:
-    def __init__(self, game):
-        self.game = game
-        self.ray_casting_result = []
-        self.objects_to_render = []
-        self.textures = self.game.object_renderer.wall_textures
-
-    def get_objects_to_render(self):
-        self.objects_to_render = []
-        for ray, values in enumerate(self.ray_casting_result):
-            depth, proj_height, texture, offset = values
-
-            if proj_height < HEIGHT:
-                wall_column = self.textures[texture].subsurface(
-                    offset * (TEXTURE_SIZE - SCALE), 0, SCALE, TEXTURE_SIZE
-                )
-                wall_column = pg.transform.scale(wall_column, (SCALE, proj_height))
-                wall_pos = (ray * SCALE, HALF_HEIGHT - proj_height // 2)
-            else:
-                texture_height = TEXTURE_SIZE * HEIGHT / proj_height
-                wall_column = self.textures[texture].subsurface(
-                    offset * (TEXTURE_SIZE - SCALE), HALF_TEXTURE_SIZE - texture_height // 2,
-                    SCALE, texture_height
-                )
-                wall_column = pg.transform.scale(wall_column, (SCALE, HEIGHT))
-                wall_pos = (ray * SCALE, 0)
-
-            self.objects_to_render.append((depth, wall_column, wall_pos))
-
-    def ray_cast(self):
-        self.ray_casting_result = []
-        texture_vert, texture_hor = 1, 1
-        ox, oy = self.game.player.pos
-        x_map, y_map = self.game.player.map_pos
-
-        ray_angle = self.game.player.angle - HALF_FOV + 0.0001
-        for ray in range(NUM_RAYS):
-            sin_a = math.sin(ray_angle)
-            cos_a = math.cos(ray_angle)
-
-            # horizontals
-            y_hor, dy = (y_map + 1, 1) if sin_a > 0 else (y_map - 1e-6, -1)
-
-            depth_hor = (y_hor - oy) / sin_a
-            x_hor = ox + depth_hor * cos_a
-
-            delta_depth = dy / sin_a
-            dx = delta_depth * cos_a
-
-            for i in range(MAX_DEPTH):
-                tile_hor = int(x_hor), int(y_hor)
-                if tile_hor in self.game.map.world_map:
-                    texture_hor = self.game.map.world_map[tile_hor]
-                    break
-                x_hor += dx
-                y_hor += dy
-                depth_hor += delta_depth
-
-            # verticals
-            x_vert, dx = (x_map + 1, 1) if cos_a > 0 else (x_map - 1e-6, -1)
-
-            depth_vert = (x_vert - ox) / cos_a
-            y_vert = oy + depth_vert * sin_a
-
-            delta_depth = dx / cos_a
-            dy = delta_depth * sin_a
-
-            for i in range(MAX_DEPTH):
-                tile_vert = int(x_vert), int(y_vert)
-                if tile_vert in self.game.map.world_map:
-                    texture_vert = self.game.map.world_map[tile_vert]
-                    break
-                x_vert += dx
-                y_vert += dy
-                depth_vert += delta_depth
-
-            # depth, texture offset
-            if depth_vert < depth_hor:
-                depth, texture = depth_vert, texture_vert
-                y_vert %= 1
-                offset = y_vert if cos_a > 0 else (1 - y_vert)
-            else:
-                depth, texture = depth_hor, texture_hor
-                x_hor %= 1
-                offset = (1 - x_hor) if sin_a > 0 else x_hor
-
-            # remove fishbowl effect
-            depth *= math.cos(self.game.player.angle - ray_angle)
-
-            # projection
-            proj_height = SCREEN_DIST / (depth + 0.0001)
-
-            # ray casting result
-            self.ray_casting_result.append((depth, proj_height, texture, offset))
-
-            ray_angle += DELTA_ANGLE
-
-    def update(self):
-        self.ray_cast()
-        self.get_objects_to_render()
\ No newline at end of file
+import pygame as pg
+import math
+import numpy as np
+from settings import *
+from assets import *
+
+
+class RayCasting:
+    def __init__(self, game):
+        self.game = game
+        self.ray_casting_result = []
+        self.objects_to_render = []
+        self.textures = self.game.object_renderer.wall_textures
+        self.ray_angles = np.arange(NUM_RAYS) * DELTA_ANGLE - HALF_FOV + 0.0001
+        self.ray_arrays = None
+        self.depth_buffer = np.full(WIDTH, np.inf)
+        if WALL_RENDERER == 'framebuffer' and self.textures:
+            self.texture_index, self.texture_pixels = self.get_texture_pixels()
+            self.column_offsets = np.tile(np.arange(SCALE, dtype=np.int32), NUM_RAYS)
+            self.screen_rows = np.arange(HEIGHT, dtype=np.float32)
+
+    def get_texture_pixels(self):
+        # the same textures on the same screen give the same tables, so they are built once
+        key = 'texture_pixels', self.game.screen, tuple(self.textures.items())
+        return load_cached(key, self.build_texture_pixels)
+
+    def build_texture_pixels(self):
+        texture_index = np.zeros(max(self.textures) + 1, dtype=np.int32)
+        pixels = []
+        for i, (key, texture) in enumerate(self.textures.items()):
+            texture_index[key] = i
+            pixels.append(pg.surfarray.array2d(texture.convert(self.game.screen)))
+        return texture_index, np.stack(pixels).astype(np.uint32).ravel()
+
+    def draw_walls(self, surface):
+        depth, proj_height, texture, offset = self.ray_arrays
+        self.depth_buffer = np.repeat(depth, SCALE)
+
+        proj_height = np.repeat(proj_height.astype(np.float32), SCALE)
+        wall_top = HALF_HEIGHT - proj_height / 2
+        top = max(int(wall_top.min()), 0)
+        bottom = min(int(HALF_HEIGHT + proj_height.max() / 2) + 1, HEIGHT)
+        if top >= bottom:
+            return
+
+        # index of the first texel of every screen column in the flattened textures
+        texture_x = np.repeat((offset * (TEXTURE_SIZE - SCALE)).astype(np.int32), SCALE) + self.column_offsets
+        column_start = (np.repeat(self.texture_index[texture], SCALE) * TEXTURE_SIZE + texture_x) * TEXTURE_SIZE
+
+        # rows x columns gather, laid out like the surface memory
+        rows = self.screen_rows[top:bottom, None]
+        texture_y = ((rows - wall_top) * (TEXTURE_SIZE / proj_height)).astype(np.int32)
+        visible = (texture_y >= 0) & (texture_y < TEXTURE_SIZE)
+        np.clip(texture_y, 0, TEXTURE_SIZE - 1, out=texture_y)
+        texture_y += column_start
+
+        frame = pg.surfarray.pixels2d(surface).T
+        np.copyto(frame[top:bottom], np.take(self.texture_pixels, texture_y), where=visible)
+        del frame
+
+    def get_objects_to_render(self):
+        self.objects_to_render = []
+        for ray, values in enumerate(self.ray_casting_result):
+            depth, proj_height, texture, offset = values
+
+            if proj_height < HEIGHT:
+                wall_column = self.textures[texture].subsurface(
+                    offset * (TEXTURE_SIZE - SCALE), 0, SCALE, TEXTURE_SIZE
+                )
+                wall_column = pg.transform.scale(wall_column, (SCALE, proj_height))
+                wall_pos = (ray * SCALE, HALF_HEIGHT - proj_height // 2)
+            else:
+                texture_height = TEXTURE_SIZE * HEIGHT / proj_height
+                wall_column = self.textures[texture].subsurface(
+                    offset * (TEXTURE_SIZE - SCALE), HALF_TEXTURE_SIZE - texture_height // 2,
+                    SCALE, texture_height
+                )
+                wall_column = pg.transform.scale(wall_column, (SCALE, HEIGHT))
+                wall_pos = (ray * SCALE, 0)
+
+            self.objects_to_render.append((depth, wall_column, wall_pos))
+
+    def ray_cast(self):
+        self.ray_casting_result = []
+        texture_vert, texture_hor = 1, 1
+        ox, oy = self.game.player.pos
+        x_map, y_map = self.game.player.map_pos
+
+        ray_angle = self.game.player.angle - HALF_FOV + 0.0001
+        for ray in range(NUM_RAYS):
+            sin_a = math.sin(ray_angle)
+            cos_a = math.cos(ray_angle)
+
+            # horizontals
+            y_hor, dy = (y_map + 1, 1) if sin_a > 0 else (y_map - 1e-6, -1)
+
+            depth_hor = (y_hor - oy) / sin_a
+            x_hor = ox + depth_hor * cos_a
+
+            delta_depth = dy / sin_a
+            dx = delta_depth * cos_a
+
+            for i in range(MAX_DEPTH):
+                tile_hor = int(x_hor), int(y_hor)
+                if self.game.map.is_wall(*tile_hor):
+                    texture_hor = self.game.map.get_tile(*tile_hor)
+                    break
+                x_hor += dx
+                y_hor += dy
+                depth_hor += delta_depth
+
+            # verticals
+            x_vert, dx = (x_map + 1, 1) if cos_a > 0 else (x_map - 1e-6, -1)
+
+            depth_vert = (x_vert - ox) / cos_a
+            y_vert = oy + depth_vert * sin_a
+
+            delta_depth = dx / cos_a
+            dy = delta_depth * sin_a
+
+            for i in range(MAX_DEPTH):
+                tile_vert = int(x_vert), int(y_vert)
+                if self.game.map.is_wall(*tile_vert):
+                    texture_vert = self.game.map.get_tile(*tile_vert)
+                    break
+                x_vert += dx
+                y_vert += dy
+                depth_vert += delta_depth
+
+            # depth, texture offset
+            if depth_vert < depth_hor:
+                depth, texture = depth_vert, texture_vert
+                y_vert %= 1
+                offset = y_vert if cos_a > 0 else (1 - y_vert)
+            else:
+                depth, texture = depth_hor, texture_hor
+                x_hor %= 1
+                offset = (1 - x_hor) if sin_a > 0 else x_hor
+
+            # remove fishbowl effect
+            depth *= math.cos(self.game.player.angle - ray_angle)
+
+            # projection
+            proj_height = SCREEN_DIST / (depth + 0.0001)
+
+            # ray casting result
+            self.ray_casting_result.append((depth, proj_height, texture, offset))
+
+            ray_angle += DELTA_ANGLE
+
+    def march(self, x, y, dx, dy, depth, delta_depth):
+        texture = np.zeros(x.size, dtype=self.game.map.grid.dtype)
+        active = np.arange(x.size)
+
+        for i in range(MAX_DEPTH):
+            tile = self.game.map.get_tiles(x[active], y[active])
+            hit = tile > 0
+            texture[active[hit]] = tile[hit]
+            active = active[~hit]
+            if not active.size:
+                break
+            x[active] += dx[active]
+            y[active] += dy[active]
+            depth[active] += delta_depth[active]
+
+        # rays that hit nothing keep the texture of the previous ray, as in ray_cast
+        hits = np.where(texture > 0, np.arange(x.size), 0)
+        texture = texture[np.maximum.accumulate(hits)]
+        texture[texture == 0] = 1
+        return texture
+
+    def ray_cast_numpy(self):
+        ox, oy = self.game.player.pos
+        x_map, y_map = self.game.player.map_pos
+
+        ray_angle = self.game.player.angle + self.ray_angles
+        sin_a = np.sin(ray_angle)
+        cos_a = np.cos(ray_angle)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # horizontals
+            y_hor = np.where(sin_a > 0, y_map + 1, y_map - 1e-6)
+            dy = np.where(sin_a > 0, 1.0, -1.0)
+
+            depth_hor = (y_hor - oy) / sin_a
+            x_hor = ox + depth_hor * cos_a
+
+            delta_depth = dy / sin_a
+            dx = delta_depth * cos_a
+
+            texture_hor = self.march(x_hor, y_hor, dx, dy, depth_hor, delta_depth)
+
+            # verticals
+            x_vert = np.where(cos_a > 0, x_map + 1, x_map - 1e-6)
+            dx = np.where(cos_a > 0, 1.0, -1.0)
+
+            depth_vert = (x_vert - ox) / cos_a
+            y_vert = oy + depth_vert * sin_a
+
+            delta_depth = dx / cos_a
+            dy = delta_depth * sin_a
+
+            texture_vert = self.march(x_vert, y_vert, dx, dy, depth_vert, delta_depth)
+
+            # depth, texture offset
+            vert = depth_vert < depth_hor
+            depth = np.where(vert, depth_vert, depth_hor)
+            texture = np.where(vert, texture_vert, texture_hor)
+            y_vert %= 1
+            x_hor %= 1
+            offset = np.where(vert, np.where(cos_a > 0, y_vert, 1 - y_vert),
+                              np.where(sin_a > 0, 1 - x_hor, x_hor))
+
+        # remove fishbowl effect
+        depth *= np.cos(self.ray_angles)
+
+        # projection
+        proj_height = SCREEN_DIST / (depth + 0.0001)
+
+        self.ray_arrays = depth, proj_height, texture, offset
+        self.ray_casting_result = list(zip(depth.tolist(), proj_height.tolist(),
+                                           texture.tolist(), offset.tolist()))
+
+    def get_first_hits(self, x, y, depth, tile_x, tile_y):
+        # depth of the first npc tile and of the first wall along each ray, 0 when there is none
+        x = np.trunc(np.where(np.isfinite(x), x, -1))
+        y = np.trunc(np.where(np.isfinite(y), y, -1))
+        is_npc = (x == tile_x[:, None]) & (y == tile_y[:, None])
+        hit = is_npc | (self.game.map.get_tiles(x, y) > 0)
+        first = hit.argmax(axis=1)
+        rays = np.arange(len(x))
+        depth = np.where(hit[rays, first], depth[rays, first], 0)
+        is_npc = is_npc[rays, first]
+        return np.where(is_npc, depth, 0), np.where(is_npc, 0, depth)
+
+    def get_line_of_sight(self, positions):
+        # NPC.ray_cast_player_npc for every npc position at once
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        ox, oy = self.game.player.pos
+        x_map, y_map = self.game.player.map_pos
+        tile_x, tile_y = np.trunc(positions[:, 0]), np.trunc(positions[:, 1])
+
+        ray_angle = np.arctan2(positions[:, 1] - oy, positions[:, 0] - ox)[:, None]
+        sin_a = np.sin(ray_angle)
+        cos_a = np.cos(ray_angle)
+        steps = np.arange(MAX_DEPTH)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # horizontals
+            y_hor = np.where(sin_a > 0, y_map + 1, y_map - 1e-6) + np.where(sin_a > 0, 1, -1) * steps
+            depth_hor = (y_hor - oy) / sin_a
+            x_hor = ox + depth_hor * cos_a
+            player_dist_h, wall_dist_h = self.get_first_hits(x_hor, y_hor, depth_hor, tile_x, tile_y)
+
+            # verticals
+            x_vert = np.where(cos_a > 0, x_map + 1, x_map - 1e-6) + np.where(cos_a > 0, 1, -1) * steps
+            depth_vert = (x_vert - ox) / cos_a
+            y_vert = oy + depth_vert * sin_a
+            player_dist_v, wall_dist_v = self.get_first_hits(x_vert, y_vert, depth_vert, tile_x, tile_y)
+
+        player_dist = np.maximum(player_dist_v, player_dist_h)
+        wall_dist = np.maximum(wall_dist_v, wall_dist_h)
+        visible = ((0 < player_dist) & (player_dist < wall_dist)) | (wall_dist == 0)
+        visible |= (tile_x == x_map) & (tile_y == y_map)
+        return visible, wall_dist
+
+    def check_ray_cast(self, tolerance=1e-6):
+        result = self.ray_casting_result
+        self.ray_cast()
+        for ray, (values, expected) in enumerate(zip(result, self.ray_casting_result)):
+            depth, proj_height, texture, offset = values
+            if (texture != expected[2] or abs(depth - expected[0]) > tolerance
+                    or abs(offset - expected[3]) > tolerance):
+                print(f"Error: ray {ray} mismatch, got {values}, expected {expected}")
+        self.ray_casting_result = result
+
+    def update(self):
+        if RAY_CASTING_ENGINE == 'numpy':
+            self.ray_cast_numpy()
+            if RAY_CASTING_CHECK:
+                self.check_ray_cast()
+        else:
+            self.ray_cast()
+            self.ray_arrays = tuple(np.array(values) for values in zip(*self.ray_casting_result))
+
+        if WALL_RENDERER == 'framebuffer':
+            self.objects_to_render = []
+        else:
+            self.get_objects_to_render()
\ No newline at end of file
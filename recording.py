@@ -0,0 +1,75 @@
+import os
+import random
+import struct
+from controls import *
+
+header = struct.Struct('<4sBI16s')  # magic, version, seed, weapon
+tick = struct.Struct('<Bhh')  # pressed keys bitmask with fire as the top bit, mouse rel x and y
+MAGIC, VERSION = b'DREC', 1
+recorded_keys = (pg.K_w, pg.K_s, pg.K_a, pg.K_d, pg.K_e)
+FIRE_BIT = 0x80
+
+
+def clamp_short(value):
+    return max(-0x8000, min(0x7fff, int(value)))
+
+
+class InputRecorder:
+    # passes the input of `source` on and streams it to a file, with the seed the game was started from
+    def __init__(self, game, source, path, seed=None):
+        self.game = game
+        self.source = source
+        self.seed = int.from_bytes(os.urandom(4), 'little') if seed is None else seed
+        random.seed(self.seed)
+        self.file = open(path, 'wb')
+        weapon = game.selected_weapon.lower().encode()
+        self.file.write(header.pack(MAGIC, VERSION, self.seed, weapon))
+        self.keys, self.mouse_rel, self.fire = ScriptedKeys(), (0, 0), False
+
+    def handle_event(self, event):
+        self.source.handle_event(event)
+
+    def update(self):
+        self.source.update()
+        keys = self.source.get_keys()
+        pressed = [key for key in recorded_keys if keys[key]]
+        self.keys = ScriptedKeys(pressed)
+        self.mouse_rel = tuple(clamp_short(rel) for rel in self.source.get_mouse_rel())
+        self.fire = bool(self.source.get_fire())
+        mask = sum(1 << recorded_keys.index(key) for key in pressed) | (FIRE_BIT if self.fire else 0)
+        self.file.write(tick.pack(mask, *self.mouse_rel))
+
+    def get_keys(self):
+        return self.keys
+
+    def get_mouse_rel(self):
+        return self.mouse_rel
+
+    def get_fire(self):
+        return self.fire
+
+    def close(self):
+        self.file.close()
+
+
+def load_recording(path):
+    # (seed, weapon, per tick commands for ScriptedInput)
+    with open(path, 'rb') as file:
+        data = file.read()
+    magic, version, seed, weapon = header.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} input recording")
+    commands = []
+    for mask, rel_x, rel_y in tick.iter_unpack(data[header.size:len(data) - (len(data) - header.size) % tick.size]):
+        keys = [key for i, key in enumerate(recorded_keys) if mask >> i & 1]
+        commands.append((keys, (rel_x, rel_y), bool(mask & FIRE_BIT)))
+    return seed, weapon.rstrip(b'\0').decode(), commands
+
+
+class InputReplay(ScriptedInput):
+    # feeds a recording back tick by tick, seeding the game the way the recorded one was
+    def __init__(self, game, path):
+        self.seed, weapon, commands = load_recording(path)
+        random.seed(self.seed)
+        game.selected_weapon = weapon
+        super().__init__(game, commands)
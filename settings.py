@@ -1,36 +1,93 @@
-import math
-
-# game settings
-RES = WIDTH, HEIGHT = 1920, 1080
-# RES = WIDTH, HEIGHT = 1920, 1080
-HALF_WIDTH = WIDTH // 2
-HALF_HEIGHT = HEIGHT // 2
-FPS = 0
-
-PLAYER_POS = 1.5, 5  # mini_map
-PLAYER_ANGLE = 0
-PLAYER_SPEED = 0.004
-PLAYER_ROT_SPEED = 0.002
-PLAYER_SIZE_SCALE = 60
-PLAYER_MAX_HEALTH = 100
-
-MOUSE_SENSITIVITY = 0.0003
-MOUSE_MAX_REL = 40
-MOUSE_BORDER_LEFT = 100
-MOUSE_BORDER_RIGHT = WIDTH - MOUSE_BORDER_LEFT
-
-
-FLOOR_COLOR = (30, 30, 30)
-
-FOV = math.pi / 3
-HALF_FOV = FOV / 2
-NUM_RAYS = WIDTH // 2
-HALF_NUM_RAYS = NUM_RAYS // 2
-DELTA_ANGLE = FOV / NUM_RAYS
-MAX_DEPTH = 20
-
-SCREEN_DIST = HALF_WIDTH / math.tan(HALF_FOV)
-SCALE = WIDTH // NUM_RAYS
-
-TEXTURE_SIZE = 256
-HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
\ No newline at end of file
+import math
+
+# game settings
+RES = WIDTH, HEIGHT = 1920, 1080
+# RES = WIDTH, HEIGHT = 1920, 1080
+HALF_WIDTH = WIDTH // 2
+HALF_HEIGHT = HEIGHT // 2
+FPS = 0
+SIM_TICK_RATE = 60  # fixed simulation ticks per second, frames are interpolated between ticks
+SIM_TICK = 1000 / SIM_TICK_RATE  # ms
+SIM_MAX_TICKS = 5  # ticks run per frame at most, the rest of a longer stall is dropped
+SIM_TRIGGER_TIME = 40  # ms of simulated time between global animation triggers
+RECORD_INPUT = None  # file to record the seed and input of each game to, e.g. 'session.rec'
+REPLAY_INPUT = None  # recording to play back instead of the keyboard and mouse
+
+PLAYER_POS = 1.5, 5  # used when the level does not place the player
+PLAYER_ANGLE = 0
+LEVEL = 'levels/e1m1.json'  # .json level, or .txt with only the map rows, see level.py
+LEVEL_CACHE_DIR = '.level_cache'  # compiled levels, keyed by a hash of the level file
+MINI_MAP_TILES = 64  # tiles across the mini-map, larger maps show a window around the player
+CHUNK_STREAMING = True  # only create and simulate entities in chunks around the player, see chunks.py
+CHUNK_SIZE = 16  # tiles per chunk side
+CHUNK_RADIUS = 2  # chunks loaded around the player's chunk, CHUNK_SIZE * CHUNK_RADIUS should reach MAX_DEPTH
+PLAYER_SPEED = 0.004
+PLAYER_ROT_SPEED = 0.002
+PLAYER_SIZE_SCALE = 60
+PLAYER_MAX_HEALTH = 100
+PLAYER_USE_DIST = 1.5  # how far away doors and push walls can be used from, see doors.py
+
+DOOR_MOVE_TIME = 500  # ms a door takes to open or close
+DOOR_OPEN_TIME = 3000  # ms a door stays open before it closes again
+PUSH_WALL_STEP_TIME = 400  # ms a push wall takes to move one tile
+PUSH_WALL_DIST = 2  # tiles a push wall moves when used
+BREAKABLE_WALL_HEALTH = 100
+
+MOUSE_SENSITIVITY = 0.0003
+MOUSE_MAX_REL = 40
+MOUSE_BORDER_LEFT = 100
+MOUSE_BORDER_RIGHT = WIDTH - MOUSE_BORDER_LEFT
+
+
+FLOOR_COLOR = (30, 30, 30)
+
+FOV = math.pi / 3
+HALF_FOV = FOV / 2
+NUM_RAYS = WIDTH // 2
+HALF_NUM_RAYS = NUM_RAYS // 2
+DELTA_ANGLE = FOV / NUM_RAYS
+MAX_DEPTH = 20
+RAY_CASTING_ENGINE = 'numpy'  # 'python' or 'numpy'
+RAY_CASTING_CHECK = False  # compare the numpy engine against the python one every frame
+VISIBILITY_TABLE = False  # precompute tile to tile visibility for npc line of sight and sprite culling
+VISIBILITY_RADIUS = MAX_DEPTH  # tiles covered around each tile
+NPC_LOS_BATCH = True  # cast every npc line of sight in one numpy pass per frame
+NPC_UPDATE = 'batch'  # 'batch' updates all npcs from the NPCStore arrays, 'objects' one npc at a time
+NPC_SEPARATION = 0.5  # how hard moving npcs steer away from each other, 0 to turn it off
+NPC_SEPARATION_RADIUS = 0.6  # up to one tile
+NPC_HASH_CHECK = False  # compare the npc spatial hash with brute force on random queries every frame
+HITSCAN_CHECK = False  # compare every shot and random rays from the same spot with a test of every live npc
+NPC_COUNT = 20
+NPC_WEIGHTS = {'SoldierNPC': 70, 'CacoDemonNPC': 20, 'CyberDemonNPC': 10}  # relative spawn chances
+SPAWN_ZONES = None  # (x0, y0, x1, y1) tile rects npcs spawn in, end exclusive, None for the whole map
+SPAWN_EXCLUDE = ((0, 0, 10, 10),)  # tile rects kept free of npcs, the player starts in the first one
+SPAWN_DENSITY = 1.0  # fraction of the free spawn tiles that may get an npc, one npc per tile at most
+AI_LOD = True  # npcs far away or idle run their logic less often, see ai_scheduler.py
+AI_LOD_INTERVALS = (1, 4, 16, 0)  # ticks between updates when active, near, far and dormant (0 never)
+AI_LOD_NEAR_DIST = 8  # idle npcs closer than this or on screen are near
+
+SCREEN_DIST = HALF_WIDTH / math.tan(HALF_FOV)
+SCALE = WIDTH // NUM_RAYS
+WALL_RENDERER = 'framebuffer'  # 'columns' or 'framebuffer'
+
+TEXTURE_SIZE = 256
+HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
+
+PATH_SEARCH = 'flow_field'  # 'flow_field', 'bfs', 'astar', 'jps' or 'hpa'
+PATH_CORNER_CUTTING = False  # allow diagonal steps past a wall corner
+PATH_CLUSTER_SIZE = 8  # tiles per side of an 'hpa' cluster
+# resolve 'bfs', 'astar' and 'jps' searches on background workers. results arrive after a wall clock delay,
+# so games that record or replay input and headless games search synchronously to stay deterministic
+PATH_ASYNC = False
+PATH_WORKER = 'process'  # 'thread' or 'process'
+PATH_WORKERS = 2
+PATH_WORKER_CHANGES = 64  # tile changes sent along with requests before the workers get a fresh nav graph
+PATH_FRAME_BUDGET = 2  # ms of synchronous searches per frame for npcs without a route
+# compare jump point search and bfs with A* on random routes,
+# and the 'hpa' graph with a full rebuild, after every tile change
+PATH_CHECK = False
+# the npc flow field is always rebuilt when the player changes tile, this also rebuilds it when an npc
+# changes tile, which in a crowd is nearly every tick. off, the field only knows the walls and npcs
+# step around an occupied tile instead
+PATH_OCCUPANCY_REBUILD = False
+PATH_OCCUPIED_COST = 2  # npcs walk around an occupied tile if that is fewer steps longer than this
@@ -1,20 +1,21 @@
-import pygame as pg
-
-
-class Sound:
-    def __init__(self, game):
-        self.game = game
-        pg.mixer.init()
-        self.path = 'resources/sound/'
-        self.shotgun = pg.mixer.Sound(self.path + 'shotgun.wav')
-        self.pistol = pg.mixer.Sound(self.path + 'Revolver Gun Shot 1 - QuickSounds.com.mp3')
-        
-        self.rifle = pg.mixer.Sound(self.path + 'machinegunloopwav-14862 (mp3cut.net).mp3')
-
-        self.npc_pain = pg.mixer.Sound(self.path + 'npc_pain.wav')
-        self.npc_death = pg.mixer.Sound(self.path + 'npc_death.wav')
-        self.npc_shot = pg.mixer.Sound(self.path + 'npc_attack.wav')
-        self.npc_shot.set_volume(0.2)
-        self.player_pain = pg.mixer.Sound(self.path + 'player_pain.wav')
-        self.theme = pg.mixer.music.load(self.path + 'theme.mp3')
+import pygame as pg
+from assets import *
+
+
+class Sound:
+    def __init__(self, game):
+        self.game = game
+        pg.mixer.init()
+        self.path = 'resources/sound/'
+        self.shotgun = load_sound(self.path + 'shotgun.wav')
+        self.pistol = load_sound(self.path + 'Revolver Gun Shot 1 - QuickSounds.com.mp3')
+        
+        self.rifle = load_sound(self.path + 'machinegunloopwav-14862 (mp3cut.net).mp3')
+
+        self.npc_pain = load_sound(self.path + 'npc_pain.wav')
+        self.npc_death = load_sound(self.path + 'npc_death.wav')
+        self.npc_shot = load_sound(self.path + 'npc_attack.wav')
+        self.npc_shot.set_volume(0.2)
+        self.player_pain = load_sound(self.path + 'player_pain.wav')
+        self.theme = pg.mixer.music.load(self.path + 'theme.mp3')
         pg.mixer.music.set_volume(0.7)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import math
+import numpy as np
+
+
+class SpatialHash:
+    # uniform grid of map tiles holding integer item ids, e.g. NPCStore indices.
+    # each cell keeps its items in a linked list, so an item crossing a border only touches its old and new cell
+    def __init__(self, cols, rows):
+        self.cols, self.rows = cols, rows
+        self.counts = np.zeros(cols * rows, dtype=np.int32)
+        self.counts_view = memoryview(self.counts)
+        self.heads = np.full(cols * rows, -1, dtype=np.int64)  # first item of each cell, -1 when empty
+        self.item_cells = np.zeros(0, dtype=np.int64)  # -1 when the item is not in the grid
+        self.next_items = np.zeros(0, dtype=np.int64)  # next item in the same cell, -1 at the end
+        self.prev_items = np.zeros(0, dtype=np.int64)  # previous item in the same cell, -1 at the head
+        self.occupied = 0
+        self.version = 0  # bumped when a tile becomes occupied or empty
+
+    def update(self, tile_x, tile_y, present):
+        cells = np.where(present, tile_x * self.rows + tile_y, -1)
+        if cells.size > self.item_cells.size:
+            extra = np.full(cells.size - self.item_cells.size, -1, dtype=np.int64)
+            self.item_cells = np.concatenate((self.item_cells, extra))
+            self.next_items = np.concatenate((self.next_items, extra))
+            self.prev_items = np.concatenate((self.prev_items, extra))
+
+        # only items that crossed a tile border touch the grid
+        changed = np.flatnonzero(cells != self.item_cells[:cells.size])
+        if not changed.size:
+            return
+        old, new = self.item_cells[changed], cells[changed]
+        self.relink(changed.tolist(), old.tolist(), new.tolist())
+        self.item_cells[changed] = new
+
+        old, new = old[old >= 0], new[new >= 0]
+        touched = np.unique(np.concatenate((old, new)))
+        was_occupied = self.counts[touched] > 0
+        np.subtract.at(self.counts, old, 1)
+        np.add.at(self.counts, new, 1)
+        occupied = self.counts[touched] > 0
+        if (occupied != was_occupied).any():
+            self.occupied += int(occupied.sum()) - int(was_occupied.sum())
+            self.version += 1
+
+    def relink(self, items, old_cells, new_cells):
+        # moves each item from the list of its old cell to the front of its new one, one at a time
+        # since several may share a cell
+        heads, next_items, prev_items = self.heads, self.next_items, self.prev_items
+        for item, old_cell, new_cell in zip(items, old_cells, new_cells):
+            if old_cell >= 0:
+                prev_item, next_item = prev_items[item], next_items[item]
+                if prev_item >= 0:
+                    next_items[prev_item] = next_item
+                else:
+                    heads[old_cell] = next_item
+                if next_item >= 0:
+                    prev_items[next_item] = prev_item
+            if new_cell >= 0:
+                next_item = heads[new_cell]
+                next_items[item], prev_items[item] = next_item, -1
+                if next_item >= 0:
+                    prev_items[next_item] = item
+                heads[new_cell] = item
+
+    def __contains__(self, tile):
+        x, y = tile
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.counts_view[x * self.rows + y] > 0
+
+    def __len__(self):
+        return self.occupied
+
+    def __iter__(self):
+        return (divmod(cell, self.rows) for cell in np.flatnonzero(self.counts).tolist())
+
+    def walk(self, cells):
+        # (index into cells, item) of every item in cells, grouped by cell in the given order.
+        # all lists are followed together, a step per item of the fullest cell
+        owners, items = np.arange(cells.size), self.heads[cells]
+        found_owners, found = [owners[:0]], [items[:0]]
+        while items.size:
+            keep = items >= 0
+            owners, items = owners[keep], items[keep]
+            found_owners.append(owners)
+            found.append(items)
+            items = self.next_items[items]
+        owners, items = np.concatenate(found_owners), np.concatenate(found)
+        order = np.argsort(owners, kind='stable')
+        return owners[order], items[order]
+
+    def get_items(self, x, y):
+        if not (0 <= x < self.cols and 0 <= y < self.rows) or not self.counts_view[x * self.rows + y]:
+            return self.heads[:0]
+        return self.walk(np.array([x * self.rows + y]))[1]
+
+    def get_items_in(self, x0, y0, x1, y1):
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.cols - 1), min(y1, self.rows - 1)
+        if x0 > x1 or y0 > y1:
+            return self.heads[:0]
+        xs, ys = np.nonzero(self.counts.reshape(self.cols, self.rows)[x0:x1 + 1, y0:y1 + 1])
+        return self.walk((xs + x0) * self.rows + ys + y0)[1]
+
+    def get_items_around(self, xs, ys, ring=1):
+        # every item within ring tiles of any of the tiles (xs, ys), each once
+        offsets = np.arange(-ring, ring + 1)
+        x = (np.asarray(xs, dtype=np.int64)[:, None, None] + offsets[None, :, None]).repeat(offsets.size, 2).ravel()
+        y = (np.asarray(ys, dtype=np.int64)[:, None, None] + offsets[None, None, :]).repeat(offsets.size, 1).ravel()
+        inside = (x >= 0) & (x < self.cols) & (y >= 0) & (y < self.rows)
+        cells = np.unique(x[inside] * self.rows + y[inside])
+        return self.walk(cells[self.counts[cells] > 0])[1]
+
+    def query_radius(self, x, y, radius, xs, ys):
+        items = self.get_items_in(int(x - radius), int(y - radius), int(x + radius), int(y + radius))
+        return items[np.hypot(xs[items] - x, ys[items] - y) <= radius]
+
+    def get_ring(self, x, y, ring):
+        if not ring:
+            return self.get_items(x, y)
+        return np.concatenate((self.get_items_in(x - ring, y - ring, x + ring, y - ring),
+                               self.get_items_in(x - ring, y + ring, x + ring, y + ring),
+                               self.get_items_in(x - ring, y - ring + 1, x - ring, y + ring - 1),
+                               self.get_items_in(x + ring, y - ring + 1, x + ring, y + ring - 1)))
+
+    def query_nearest(self, x, y, xs, ys, max_radius=math.inf, exclude=None):
+        best, best_dist = None, math.inf
+        for ring in range(max(self.cols, self.rows)):
+            items = self.get_ring(int(x), int(y), ring)
+            if exclude is not None:
+                items = items[items != exclude]
+            if items.size:
+                dists = np.hypot(xs[items] - x, ys[items] - y)
+                i = dists.argmin()
+                if dists[i] < best_dist and dists[i] <= max_radius:
+                    best, best_dist = int(items[i]), float(dists[i])
+            # anything further out is at least `ring` away
+            if ring >= min(best_dist, max_radius):
+                break
+        return best
+
+    def check(self, xs, ys, present, count=20, radius=0.6):
+        # random queries compared with brute force over the positions the hash was last updated with
+        tile_x, tile_y = xs.astype(int), ys.astype(int)
+        cells = np.where(present, tile_x * self.rows + tile_y, -1)
+        counts = np.bincount(cells[present], minlength=self.counts.size)
+        if (counts != self.counts).any() or self.occupied != np.count_nonzero(counts):
+            print(f"Error: spatial hash counts mismatch, {self.occupied} occupied, expected {np.count_nonzero(counts)}")
+            return
+        rng = np.random.default_rng()
+        for x, y in rng.uniform(0, (self.cols, self.rows), (count, 2)):
+            x0, y0, x1, y1 = int(x) - 1, int(y) - 1, int(x) + 1, int(y) + 1
+            got = np.sort(self.get_items_in(x0, y0, x1, y1))
+            expected = np.flatnonzero(present & (tile_x >= x0) & (tile_x <= x1) & (tile_y >= y0) & (tile_y <= y1))
+            if not np.array_equal(got, expected):
+                print(f"Error: items in {(x0, y0, x1, y1)} mismatch, got {got}, expected {expected}")
+            got = np.sort(self.query_radius(x, y, radius, xs, ys))
+            expected = np.flatnonzero(present & (np.hypot(xs - x, ys - y) <= radius))
+            if not np.array_equal(got, expected):
+                print(f"Error: items within {radius} of ({x:.2f}, {y:.2f}) mismatch, got {got}, expected {expected}")
+        ids = np.flatnonzero(present)
+        ids = rng.choice(ids, min(count, ids.size), replace=False)
+        i, j = self.get_pairs(ids, xs, ys, radius)
+        for item in ids.tolist():
+            got = np.sort(j[i == item])
+            near = present & (np.hypot(xs - xs[item], ys - ys[item]) < radius)
+            near[item] = False
+            expected = np.flatnonzero(near)
+            if not np.array_equal(got, expected):
+                print(f"Error: pairs of {item} mismatch, got {got}, expected {expected}")
+
+    def get_pairs(self, ids, xs, ys, radius):
+        # (i, j) for every item j within radius of each i in ids, radius up to one tile
+        cells = self.item_cells[ids]
+        tile_x, tile_y = np.divmod(cells, self.rows)
+        owners, neighbours = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                x, y = tile_x + dx, tile_y + dy
+                valid = (cells >= 0) & (x >= 0) & (x < self.cols) & (y >= 0) & (y < self.rows)
+                owners.append(np.flatnonzero(valid))
+                neighbours.append(x[valid] * self.rows + y[valid])
+        owners, neighbours = np.concatenate(owners), np.concatenate(neighbours)
+        found, j = self.walk(neighbours)
+        i = ids[owners[found]]
+        close = (i != j) & (np.hypot(xs[i] - xs[j], ys[i] - ys[j]) < radius)
+        return i[close], j[close]
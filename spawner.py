@@ -0,0 +1,37 @@
+from random import randrange
+import numpy as np
+from settings import *
+
+
+class Spawner:
+    # free tiles in the spawn zones, drawn without replacement by a partial Fisher-Yates shuffle
+    def __init__(self, game, zones=SPAWN_ZONES, exclude=SPAWN_EXCLUDE, density=SPAWN_DENSITY):
+        self.game = game
+        self.rows = game.map.rows
+        self.tiles = self.get_tiles(zones, exclude).tolist()
+        self.free = len(self.tiles)  # tiles[:free] are still free to draw
+        self.limit = int(len(self.tiles) * density)  # npcs that may still spawn
+
+    def get_tiles(self, zones, exclude):
+        free = self.game.map.grid == 0
+        allowed = np.zeros_like(free) if zones else np.ones_like(free)
+        # negative starts would count from the far end of the map and leave the slice empty
+        for x0, y0, x1, y1 in zones or ():
+            allowed[max(x0, 0):x1, max(y0, 0):y1] = True
+        for x0, y0, x1, y1 in exclude:
+            allowed[max(x0, 0):x1, max(y0, 0):y1] = False
+        return np.flatnonzero(free & allowed)
+
+    def draw(self, count):
+        # up to `count` distinct tiles, O(1) each
+        if count > self.limit:
+            print(f"Error: only {self.limit} free spawn tiles for {count} npcs")
+            count = self.limit
+        self.limit -= count
+        tiles = []
+        for i in range(count):
+            j = randrange(self.free)
+            self.free -= 1
+            self.tiles[j], self.tiles[self.free] = self.tiles[self.free], self.tiles[j]
+            tiles.append(divmod(self.tiles[self.free], self.rows))
+        return tiles
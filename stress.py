@@ -0,0 +1,84 @@
+import argparse
+import csv
+import os
+import shutil
+import time
+from headless import *
+from map_generator import *
+
+fields = ('kind', 'size', 'streaming', 'npcs', 'loaded_npcs', 'active_npcs', 'chunks', 'sprites', 'build_ms', 'load_ms', 'tick_ms', 'ray_cast_ms')
+
+
+def patrol(game, tick):
+    # walk and turn through the map, firing now and then
+    return {pg.K_w}, (3, 0), tick % 30 == 0
+
+
+def run_scenario(kind, size, npcs, ticks, seed, directory, streaming=CHUNK_STREAMING):
+    path = os.path.join(directory, f'{kind}_{size}_{npcs}_{seed}.json')
+    save_level(generate_level(kind, size, seed=seed, npcs=npcs), path)
+
+    # the first load compiles the level cache, the second one reads it.
+    # the same arguments write the same file, so its cache from an earlier run is removed first
+    shutil.rmtree(Level(path).cache_dir, ignore_errors=True)
+    start = time.perf_counter()
+    game = HeadlessGame(script=patrol, seed=seed, level=path, streaming=streaming)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    game.new_game()
+    load = time.perf_counter() - start
+
+    tick_time = ray_cast_time = 0
+    active = 0  # npcs that ran their logic, over all ticks
+    for i in range(ticks):
+        start = time.perf_counter()
+        game.tick()
+        tick_time += time.perf_counter() - start
+        stats = game.object_handler.ai_scheduler.stats
+        active += sum(stats.values()) - stats['frozen']
+        start = time.perf_counter()
+        game.raycasting.ray_cast_numpy()
+        ray_cast_time += time.perf_counter() - start
+        if game.result:
+            game.result = None
+            game.new_game()
+    game.path_service.close()
+    # npcs in the level, created in loaded chunks, and updated per tick on average
+    handler = game.object_handler
+    pending = sum(map(len, handler.chunks.pending.values()))
+    frozen = handler.ai_scheduler.stats['frozen']
+    return {'kind': kind, 'size': size, 'streaming': int(streaming), 'npcs': len(handler.npc_list) + pending,
+            'loaded_npcs': len(handler.npc_list) - frozen, 'active_npcs': round(active / ticks, 1),
+            'chunks': int(handler.chunks.loaded.sum()), 'sprites': len(handler.sprite_list),
+            'build_ms': round(build * 1000, 1), 'load_ms': round(load * 1000, 1),
+            'tick_ms': round(tick_time / ticks * 1000, 3), 'ray_cast_ms': round(ray_cast_time / ticks * 1000, 3)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the simulation on generated maps of growing size.')
+    parser.add_argument('--kinds', nargs='+', choices=generators, default=list(generators))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[64, 256, 1024])
+    parser.add_argument('--npcs', nargs='+', type=int, default=[20, 200])
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--streaming', nargs='+', type=int, choices=(0, 1), default=[0, 1],
+                        help='0 simulates every npc of the level, 1 only those in chunks around the player')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dir', default='levels/generated', help='where the generated levels are written')
+    parser.add_argument('--out', default=None, help='csv file for the results')
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    results = []
+    print(' '.join(f'{field:>11}' for field in fields))
+    for kind in args.kinds:
+        for size in args.sizes:
+            for npcs in args.npcs:
+                for streaming in args.streaming:
+                    row = run_scenario(kind, size, npcs, args.ticks, args.seed, args.dir, bool(streaming))
+                    print(' '.join(f'{row[field]:>11}' for field in fields))
+                    results.append(row)
+    if args.out:
+        with open(args.out, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fields)
+            writer.writeheader()
+            writer.writerows(results)
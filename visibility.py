@@ -0,0 +1,167 @@
+import numpy as np
+from settings import *
+
+
+class VisibilityTable:
+    # points sampled inside each tile when testing tile to tile visibility
+    samples = ((0.5, 0.5), (0.02, 0.02), (0.98, 0.02), (0.98, 0.98), (0.02, 0.98),
+               (0.5, 0.02), (0.98, 0.5), (0.5, 0.98), (0.02, 0.5))
+
+    def __init__(self, game, radius=VISIBILITY_RADIUS):
+        self.game = game
+        self.cols, self.rows = game.map.cols, game.map.rows
+        self.size = self.cols * self.rows
+        self.radius = radius
+        self.width = 2 * radius + 1
+        # one bitset per tile over the window of tiles around it:
+        # potential - some line between the tiles is clear
+        # certain - every line between the tiles is clear
+        names = f'visibility_{radius}_potential', f'visibility_{radius}_certain'
+        self.potential, self.certain = game.level.get_arrays(names, lambda: self.get_table(game.map.grid > 0))
+        self.stride = self.potential.shape[1]
+        self.get_views()
+        # tiles changed since the table was built, pairs around them fall back to the exact ray
+        self.dirty_x, self.dirty_y = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        game.map.add_listener(self.update_tile)
+
+    def get_views(self):
+        self.potential_view = memoryview(self.potential.reshape(-1))
+        self.certain_view = memoryview(self.certain.reshape(-1))
+
+    def get_pairs(self, walls):
+        free = np.argwhere(~walls)
+        r = np.arange(-self.radius, self.radius + 1)
+        dx, dy = np.repeat(r, self.width), np.tile(r, self.width)
+        ax, bx = free[:, 0, None], free[:, 0, None] + dx
+        ay, by = free[:, 1, None], free[:, 1, None] + dy
+        inside = (bx >= 0) & (bx < self.cols) & (by >= 0) & (by < self.rows)
+        inside[inside] = ~walls[bx[inside], by[inside]]
+        bits = np.broadcast_to(np.arange(dx.size), inside.shape)[inside]
+        return ax.repeat(dx.size, 1)[inside], ay.repeat(dx.size, 1)[inside], bx[inside], by[inside], bits
+
+    def get_table(self, walls):
+        ax, ay, bx, by, bits = self.get_pairs(walls)
+
+        # every line between two tiles stays inside their bounding box
+        area = np.zeros((self.cols + 1, self.rows + 1), dtype=np.int32)
+        area[1:, 1:] = walls.cumsum(0).cumsum(1)
+        x0, x1 = np.minimum(ax, bx), np.maximum(ax, bx) + 1
+        y0, y1 = np.minimum(ay, by), np.maximum(ay, by) + 1
+        certain = (area[x1, y1] - area[x0, y1] - area[x1, y0] + area[x0, y0]) == 0
+
+        # lines are symmetric, so each unordered pair is only walked once
+        a, b = ax * self.rows + ay, bx * self.rows + by
+        pairs, index = np.unique(np.minimum(a, b) * self.size + np.maximum(a, b), return_inverse=True)
+        first = np.zeros(pairs.size, dtype=np.int64)
+        first[index] = np.arange(index.size)
+        clear = certain[first]
+        rest = np.flatnonzero(~clear)
+        for chunk in np.array_split(rest, max(1, rest.size // 20000)):
+            pair = first[chunk]
+            clear[chunk] = self.get_clear(walls, ax[pair], ay[pair], bx[pair], by[pair])
+        potential = clear[index]
+
+        return self.pack(ax, ay, bits, potential), self.pack(ax, ay, bits, certain)
+
+    def get_clear(self, walls, ax, ay, bx, by):
+        # walk the grid along lines between the sample points of both tiles
+        samples = np.array(self.samples)
+        n = len(samples)
+        shape = ax.size, n, n
+        px = np.broadcast_to(ax[:, None, None] + samples[None, :, None, 0], shape).ravel()
+        py = np.broadcast_to(ay[:, None, None] + samples[None, :, None, 1], shape).ravel()
+        qx = np.broadcast_to(bx[:, None, None] + samples[None, None, :, 0], shape).ravel()
+        qy = np.broadcast_to(by[:, None, None] + samples[None, None, :, 1], shape).ravel()
+
+        x, y = px.astype(np.int64), py.astype(np.int64)
+        dx, dy = qx - px, qy - py
+        step_x, step_y = np.sign(dx).astype(np.int64), np.sign(dy).astype(np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta_x, delta_y = np.abs(1 / dx), np.abs(1 / dy)
+            t_x = np.where(dx, (x + (step_x > 0) - px) / dx, np.inf)
+            t_y = np.where(dy, (y + (step_y > 0) - py) / dy, np.inf)
+        steps = np.abs(qx.astype(np.int64) - x) + np.abs(qy.astype(np.int64) - y)
+
+        clear = np.ones(px.size, dtype=bool)
+        for i in range(steps.max(initial=0)):
+            active = steps > i
+            go_x = active & (t_x < t_y)
+            go_y = active & ~go_x
+            x += step_x * go_x
+            y += step_y * go_y
+            t_x += np.where(go_x, delta_x, 0)
+            t_y += np.where(go_y, delta_y, 0)
+            clear &= ~(active & walls[x, y])
+        return clear.reshape(-1, n * n).any(axis=1)
+
+    def pack(self, ax, ay, bits, values):
+        table = np.zeros((self.size, self.width * self.width), dtype=bool)
+        table[ax * self.rows + ay, bits] = values
+        return np.packbits(table, axis=1, bitorder='little')
+
+    def get_bit(self, a, b):
+        dx, dy = b[0] - a[0] + self.radius, b[1] - a[1] + self.radius
+        if not (0 <= dx < self.width and 0 <= dy < self.width and
+                0 <= a[0] < self.cols and 0 <= a[1] < self.rows):
+            return None
+        bit = dx * self.width + dy
+        return (a[0] * self.rows + a[1]) * self.stride + (bit >> 3), 1 << (bit & 7)
+
+    def is_visible(self, a, b):
+        # None when only an exact ray can tell
+        bit = self.get_bit(a, b)
+        if bit is None:
+            return None
+        offset, mask = bit
+        if self.dirty_x.size and self.get_dirty(a[0], a[1], b[0], b[1]):
+            return None
+        if not self.potential_view[offset] & mask:
+            return False
+        if self.certain_view[offset] & mask:
+            return True
+        return None
+
+    def get_states(self, a, xs, ys):
+        # is_visible for many tiles at once: 1 visible, 0 hidden, -1 when only an exact ray can tell
+        states = np.full(len(xs), -1, dtype=np.int8)
+        if not (0 <= a[0] < self.cols and 0 <= a[1] < self.rows):
+            return states
+        dx, dy = xs - a[0] + self.radius, ys - a[1] + self.radius
+        inside = (dx >= 0) & (dx < self.width) & (dy >= 0) & (dy < self.width)
+        bits = dx[inside] * self.width + dy[inside]
+        node = a[0] * self.rows + a[1]
+        potential = self.potential[node, bits >> 3] >> (bits & 7) & 1
+        certain = self.certain[node, bits >> 3] >> (bits & 7) & 1
+        states[inside] = np.where(potential == 0, 0, np.where(certain == 1, 1, -1))
+        if self.dirty_x.size:
+            states[self.get_dirty(a[0], a[1], xs, ys)] = -1
+        return states
+
+    def get_visible_area(self, tile, margin=1):
+        # tiles around `tile` that might be seen from it, grown by `margin` tiles
+        x, y = tile
+        if not (0 <= x < self.cols and 0 <= y < self.rows):
+            return None
+        row = np.unpackbits(self.potential[x * self.rows + y], count=self.width * self.width, bitorder='little')
+        area = row.reshape(self.width, self.width).astype(bool)
+        if self.dirty_x.size:
+            r = np.arange(-self.radius, self.radius + 1)
+            area |= self.get_dirty(x, y, x + r[:, None], y + r[None, :])
+        padded = np.pad(area, margin)
+        grown = np.zeros_like(area)
+        for dx in range(2 * margin + 1):
+            for dy in range(2 * margin + 1):
+                grown |= padded[dx:dx + self.width, dy:dy + self.width]
+        return grown
+
+    def get_dirty(self, ax, ay, bx, by):
+        # pairs of tiles a and b whose bounding box holds a changed tile, every line between them stays in it
+        dirty = np.zeros(np.broadcast(ax, ay, bx, by).shape, dtype=bool)
+        for x, y in zip(self.dirty_x.tolist(), self.dirty_y.tolist()):
+            dirty |= ((bx - x) * (ax - x) <= 0) & ((by - y) * (ay - y) <= 0)
+        return dirty
+
+    def update_tile(self, x, y):
+        # the table itself is left alone, so a door opening and closing again costs nothing
+        if not ((self.dirty_x == x) & (self.dirty_y == y)).any():
+            self.dirty_x, self.dirty_y = np.append(self.dirty_x, x), np.append(self.dirty_y, y)